@@ -2,13 +2,14 @@ from __future__ import annotations
 
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.deps import get_current_tenant, get_current_user, get_db_session
 from app.models import ImageAsset, Tenant, User
 from app.schemas.asset import AssetCreate, AssetRead
+from app.services.thumbnails import generate_asset_thumbnails
 
 router = APIRouter()
 
@@ -16,6 +17,7 @@ router = APIRouter()
 @router.post("/", response_model=AssetRead, status_code=status.HTTP_201_CREATED)
 async def create_asset(
     payload: AssetCreate,
+    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db_session),
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(get_current_user),
@@ -35,6 +37,10 @@ async def create_asset(
     session.add(asset)
     await session.commit()
     await session.refresh(asset)
+
+    if asset.thumbnail_path is None:
+        background_tasks.add_task(thumbnail_job, asset.id)
+
     return AssetRead.model_validate(asset)
 
 
@@ -60,3 +66,13 @@ async def get_asset(
     if asset is None or asset.tenant_id != tenant.id:
         raise HTTPException(status_code=404, detail="Asset not found")
     return AssetRead.model_validate(asset)
+
+
+async def thumbnail_job(asset_id: int) -> None:
+    from app.db.session import async_session
+
+    async with async_session() as session:  # type: ignore[call-arg]
+        asset = await session.get(ImageAsset, asset_id)
+        if asset is None:
+            return
+        await generate_asset_thumbnails(session, asset)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.deps import get_db_session
+from app.core.metrics import TASK_QUEUE_DEPTH, TASKS_BY_STATUS, update_pool_metrics
+from app.db.session import async_engine
+from app.models import ProcessingTask, TaskStatus
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(session: AsyncSession = Depends(get_db_session)) -> Response:
+    # Task counts come from the database at scrape time, so they are right
+    # whichever process ran the tasks.
+    result = await session.exec(
+        select(ProcessingTask.status, func.count()).group_by(ProcessingTask.status)
+    )
+    counts = dict(result.all())
+    for task_status in TaskStatus:
+        TASKS_BY_STATUS.labels(task_status.value).set(counts.get(task_status, 0))
+    TASK_QUEUE_DEPTH.set(counts.get(TaskStatus.PENDING, 0))
+
+    update_pool_metrics(async_engine.pool)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,24 +1,36 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.deps import get_current_tenant, get_current_user, get_db_session
+from app.core.config import get_settings
 from app.models import ImageAsset, ProcessingTask, Tenant, User
 from app.models.processing_task import TaskStatus
-from app.schemas.task import TaskCreate, TaskRead, TaskUpdate
-from app.services.tasks import execute_processing_task
+from app.schemas.task import TaskBatchCreate, TaskCreate, TaskRead, TaskUpdate
+from app.services.dispatcher import get_dispatcher
+from app.services.progress import (
+    ProgressEvent,
+    get_progress_broker,
+    publish_progress,
+    publish_progress_many,
+)
+from app.services.queue import cancel_task as cancel_queued_task, queue_positions
 
 router = APIRouter()
 
+# Comment lines sent on idle streams, so proxies keep the connection open.
+_KEEPALIVE_SECONDS = 15
+
 
 @router.post("/", response_model=TaskRead, status_code=status.HTTP_202_ACCEPTED)
 async def create_task(
     payload: TaskCreate,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db_session),
     tenant: Tenant = Depends(get_current_tenant),
     user: User = Depends(get_current_user),
@@ -35,15 +47,63 @@ async def create_task(
         image_asset_id=payload.image_asset_id,
         config_path=payload.config_path,
         output_dir=payload.output_dir,
+        time_budget_seconds=payload.time_budget_seconds,
         status=TaskStatus.PENDING,
     )
     session.add(task)
     await session.commit()
     await session.refresh(task)
 
-    background_tasks.add_task(process_task_job, task.id)
+    await publish_progress(ProgressEvent.from_task(task, stage="queued"))
+    if get_settings().task_queue_mode == "background":
+        get_dispatcher().notify()
 
-    return TaskRead.model_validate(task)
+    return _task_read(task, await queue_positions(session, [task.id]))
+
+
+@router.post("/batch", response_model=List[TaskRead], status_code=status.HTTP_202_ACCEPTED)
+async def create_tasks(
+    payload: TaskBatchCreate,
+    session: AsyncSession = Depends(get_db_session),
+    tenant: Tenant = Depends(get_current_tenant),
+    user: User = Depends(get_current_user),
+) -> List[TaskRead]:
+    """Queue many tasks at once, in one transaction; all or none are created."""
+
+    if payload.tenant_id != tenant.id:
+        raise HTTPException(status_code=403, detail="Invalid tenant scope")
+
+    asset_ids = {item.image_asset_id for item in payload.tasks}
+    result = await session.exec(
+        select(ImageAsset.id).where(ImageAsset.id.in_(asset_ids), ImageAsset.tenant_id == tenant.id)
+    )
+    missing = asset_ids - set(result.all())
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Image assets not found for tenant: {sorted(missing)}",
+        )
+
+    tasks = [
+        ProcessingTask(
+            tenant_id=tenant.id,
+            image_asset_id=item.image_asset_id,
+            config_path=item.config_path,
+            output_dir=item.output_dir,
+            time_budget_seconds=item.time_budget_seconds,
+            status=TaskStatus.PENDING,
+        )
+        for item in payload.tasks
+    ]
+    session.add_all(tasks)
+    await session.commit()
+
+    await publish_progress_many([ProgressEvent.from_task(task, stage="queued") for task in tasks])
+    if get_settings().task_queue_mode == "background":
+        get_dispatcher().notify()
+
+    positions = await queue_positions(session, [task.id for task in tasks])
+    return [_task_read(task, positions) for task in tasks]
 
 
 @router.get("/", response_model=List[TaskRead])
@@ -55,7 +115,37 @@ async def list_tasks(
         select(ProcessingTask).where(ProcessingTask.tenant_id == tenant.id)
     )
     tasks = result.all()
-    return [TaskRead.model_validate(task) for task in tasks]
+    positions = await queue_positions(session, _waiting_ids(tasks))
+    return [_task_read(task, positions) for task in tasks]
+
+
+@router.get("/events")
+async def stream_tenant_events(
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+    tenant: Tenant = Depends(get_current_tenant),
+) -> StreamingResponse:
+    """Server-Sent Events with the progress of every task of the tenant."""
+
+    # The stream may stay open for hours; do not hold a pooled connection.
+    await session.close()
+    return _event_response(request, tenant.id)
+
+
+@router.get("/{task_id}/events")
+async def stream_task_events(
+    task_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+    tenant: Tenant = Depends(get_current_tenant),
+) -> StreamingResponse:
+    """Server-Sent Events with the progress of one task, closed when it ends."""
+
+    task = await session.get(ProcessingTask, task_id)
+    if task is None or task.tenant_id != tenant.id:
+        raise HTTPException(status_code=404, detail="Task not found")
+    await session.close()
+    return _event_response(request, tenant.id, task_id)
 
 
 @router.get("/{task_id}", response_model=TaskRead)
@@ -67,7 +157,24 @@ async def get_task(
     task = await session.get(ProcessingTask, task_id)
     if task is None or task.tenant_id != tenant.id:
         raise HTTPException(status_code=404, detail="Task not found")
-    return TaskRead.model_validate(task)
+    return _task_read(task, await queue_positions(session, _waiting_ids([task])))
+
+
+@router.post("/{task_id}/cancel", response_model=TaskRead, status_code=status.HTTP_202_ACCEPTED)
+async def cancel_task(
+    task_id: int,
+    session: AsyncSession = Depends(get_db_session),
+    tenant: Tenant = Depends(get_current_tenant),
+) -> TaskRead:
+    task = await session.get(ProcessingTask, task_id)
+    if task is None or task.tenant_id != tenant.id:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not await cancel_queued_task(session, task_id):
+        raise HTTPException(status_code=409, detail="Task already finished")
+
+    await session.refresh(task)
+    await publish_progress(ProgressEvent.from_task(task))
+    return _task_read(task, {})
 
 
 @router.patch("/{task_id}", response_model=TaskRead)
@@ -90,11 +197,52 @@ async def update_task(
     return TaskRead.model_validate(task)
 
 
-async def process_task_job(task_id: int) -> None:
+def _waiting_ids(tasks: List[ProcessingTask]) -> list[int]:
+    # Processing tasks with an expired lease wait too.
+    waiting = (TaskStatus.PENDING, TaskStatus.PROCESSING)
+    return [task.id for task in tasks if task.status in waiting]
+
+
+def _task_read(task: ProcessingTask, positions: dict[int, int]) -> TaskRead:
+    read = TaskRead.model_validate(task)
+    read.queue_position = positions.get(task.id)
+    return read
+
+
+def _event_response(
+    request: Request, tenant_id: int, task_id: Optional[int] = None
+) -> StreamingResponse:
+    async def events() -> AsyncIterator[str]:
+        async with get_progress_broker().subscribe(tenant_id) as subscription:
+            if task_id is not None:
+                # Read after subscribing, so no event falls in between.
+                current = await _current_event(task_id)
+                yield current.to_sse()
+                if current.finished:
+                    return
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), _KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if task_id is not None and event.task_id != task_id:
+                    continue
+                yield event.to_sse()
+                if task_id is not None and event.finished:
+                    return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _current_event(task_id: int) -> ProgressEvent:
     from app.db.session import async_session
 
     async with async_session() as session:  # type: ignore[call-arg]
         task = await session.get(ProcessingTask, task_id)
-        if task is None:
-            return
-        await execute_processing_task(session, task)
+        return ProgressEvent.from_task(task)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 
 from app.api.deps import get_current_tenant, get_current_user
+from app.core.metrics import instrument_storage
 from app.models import Tenant, User
 from app.schemas.upload import UploadResponse
 from app.services.storage import get_storage_backend
@@ -21,7 +22,7 @@ async def upload_file(
         raise HTTPException(status_code=400, detail="Filename required")
 
     data = await file.read()
-    storage = get_storage_backend()
+    storage = instrument_storage(get_storage_backend())
 
     storage_key = f"tenants/{tenant.id}/uploads/{user.id}/{file.filename}"
     stored = await storage.upload_file(
@@ -31,6 +31,36 @@ class Settings(BaseSettings):
     # Redis / Queue placeholder
     redis_url: str = Field(default="redis://localhost:6379/0")
 
+    # Task queue: "background" runs tasks inside the API process, "worker"
+    # leaves them to `python -m app.worker` processes.
+    task_queue_mode: Literal["background", "worker"] = Field(default="background")
+    # A claimed task is handed to another worker when its lease is not
+    # renewed within this many seconds.
+    task_lease_seconds: int = Field(default=120, ge=10)
+    task_max_attempts: int = Field(default=3, ge=1)
+    worker_poll_seconds: float = Field(default=2.0, gt=0)
+    # Workers serve their Prometheus metrics on this port; 0 disables it.
+    worker_metrics_port: int = Field(default=9100, ge=0)
+    # Tasks running at once across all workers, and per tenant.
+    max_concurrent_tasks: int = Field(default=4, ge=1)
+    max_tasks_per_tenant: int = Field(default=2, ge=1)
+    # Default wall-clock limit of a task run in seconds; 0 means no limit.
+    task_time_budget_seconds: int = Field(default=0, ge=0)
+    # Where task progress events are relayed; "redis" is needed when tasks
+    # run in worker processes.
+    progress_broker: Literal["memory", "redis"] = Field(default="memory")
+
+    # Image processing
+    # Number of worker processes used by process_images; 1 keeps it serial.
+    processing_workers: int = Field(default=1, ge=1)
+    # Threads encoding output tiles concurrently.
+    encoding_workers: int = Field(default=4, ge=1)
+    # Persistent cache of processed tiles; disabled when unset.
+    tile_cache_dir: Optional[str] = Field(default=None)
+    tile_cache_max_bytes: int = Field(default=2 * 1024**3)
+    # Worker processes building deck parts when ppt_settings.slides_per_part is set.
+    deck_workers: int = Field(default=2, ge=1)
+
     # CORS
     cors_allow_origins: str = Field(default="http://localhost:3000,http://127.0.0.1:3000")
     cors_allow_credentials: bool = Field(default=True)
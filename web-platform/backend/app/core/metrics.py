@@ -0,0 +1,135 @@
+"""Prometheus metrics for the API, the task pipeline and storage."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being handled.")
+
+TASKS_BY_STATUS = Gauge("processing_tasks", "Processing tasks by status.", ["status"])
+TASK_QUEUE_DEPTH = Gauge("processing_task_queue_depth", "Tasks waiting to be processed.")
+TASK_DURATION = Histogram(
+    "processing_task_duration_seconds",
+    "Wall time of processing tasks by final status.",
+    ["status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+IMAGES_PROCESSED = Counter("processing_images_total", "Images processed into tiles.")
+
+STORAGE_UPLOAD_LATENCY = Histogram(
+    "storage_upload_duration_seconds", "Storage upload latency.", ["content_type"]
+)
+STORAGE_UPLOAD_BYTES = Counter(
+    "storage_upload_bytes_total", "Bytes uploaded to storage.", ["content_type"]
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Database pool connections by state.", ["state"]
+)
+
+
+class MetricsMiddleware:
+    """Record latency and in-flight count of HTTP requests.
+
+    Requests are labelled with the matched route template, not the raw path,
+    so ids in URLs do not multiply the series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(scope["method"], _route_template(scope), str(status)).observe(
+                time.perf_counter() - started
+            )
+
+
+def _route_template(scope: Scope) -> str:
+    # Routes of included routers only know their own path, so the route's
+    # template replaces the matching trailing segments of the request path
+    # and parameters of the router prefixes replace whole prefix segments.
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    own = (getattr(route, "path_format", None) or route.path).split("/")[1:]
+    params = {name: str(value) for name, value in (scope.get("path_params") or {}).items()}
+    segments = scope.get("path", "").split("/")[1:]
+    # Values of ``{name:path}`` parameters span several segments.
+    spanned = sum(params[name].count("/") for name in params if f"{{{name}}}" in own)
+    split = len(segments) - len(own) - spanned
+    if split < 0:
+        return "/" + "/".join(own)
+
+    prefix = segments[:split]
+    for name, value in params.items():
+        if f"{{{name}}}" in own:
+            continue
+        for position in range(len(prefix) - 1, -1, -1):
+            if prefix[position] == value:
+                prefix[position] = f"{{{name}}}"
+                break
+    return "/" + "/".join(prefix + own)
+
+
+class InstrumentedStorage:
+    """Storage backend wrapper that times uploads and counts their bytes."""
+
+    def __init__(self, backend: Any) -> None:
+        self._backend = backend
+
+    async def upload_file(self, *, key: str, data: bytes, content_type: str) -> Any:
+        started = time.perf_counter()
+        stored = await self._backend.upload_file(key=key, data=data, content_type=content_type)
+        STORAGE_UPLOAD_LATENCY.labels(content_type).observe(time.perf_counter() - started)
+        STORAGE_UPLOAD_BYTES.labels(content_type).inc(len(data))
+        return stored
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._backend, name)
+
+
+def instrument_storage(backend: Any) -> InstrumentedStorage:
+    if isinstance(backend, InstrumentedStorage):
+        return backend
+    return InstrumentedStorage(backend)
+
+
+def update_pool_metrics(pool: Any) -> None:
+    """Copy connection counts from a SQLAlchemy ``QueuePool``-like pool."""
+
+    for state, method in (
+        ("checked_out", "checkedout"),
+        ("idle", "checkedin"),
+        ("overflow", "overflow"),
+        ("size", "size"),
+    ):
+        counter = getattr(pool, method, None)
+        if counter is not None:
+            DB_POOL_CONNECTIONS.labels(state).set(counter())
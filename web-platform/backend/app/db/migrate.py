@@ -0,0 +1,132 @@
+"""Best-effort schema upgrade for databases created by ``create_all``."""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import Enum, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.schema import Column
+from sqlmodel import SQLModel
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def add_missing_columns(conn: Connection) -> list[str]:
+    """Add model columns that existing tables lack.
+
+    ``create_all`` only creates missing tables, so columns added to a model
+    later never reach an existing database. Nullable columns, and columns
+    with a scalar default, are added with ``ALTER TABLE ... ADD COLUMN``,
+    which SQLite and Postgres both support. Returns the added columns.
+    """
+
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = _column_ddl(column, conn)
+            if ddl is None:
+                _LOGGER.warning("Cannot add column %s.%s automatically", table.name, column.name)
+                continue
+            conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+            added.append(f"{table.name}.{column.name}")
+
+    if added:
+        _LOGGER.info("Added columns: %s", ", ".join(added))
+    return added
+
+
+def add_missing_indexes(conn: Connection) -> list[str]:
+    """Create model indexes that existing tables lack.
+
+    Like columns, indexes added to a model later are skipped by
+    ``create_all`` for existing tables. Unique indexes are left out because
+    existing rows may violate them. Returns the created index names.
+    """
+
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in SQLModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            if index.name in existing:
+                continue
+            if index.unique:
+                _LOGGER.warning("Cannot add unique index %s automatically", index.name)
+                continue
+            index.create(conn)
+            created.append(index.name)
+
+    if created:
+        _LOGGER.info("Added indexes: %s", ", ".join(created))
+    return created
+
+
+def add_missing_enum_values(conn: Connection) -> list[str]:
+    """Add new enum members to existing native Postgres enum types.
+
+    Other databases store enums as plain strings and need nothing. Returns
+    the added values as ``type.value``.
+    """
+
+    if conn.dialect.name != "postgresql":
+        return []
+
+    enum_types = {}
+    for table in SQLModel.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, Enum) and column.type.native_enum and column.type.name:
+                enum_types[column.type.name] = column.type.enums
+
+    added = []
+    for name, values in enum_types.items():
+        result = conn.execute(
+            text(
+                "SELECT e.enumlabel FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid "
+                "WHERE t.typname = :name"
+            ),
+            {"name": name},
+        )
+        existing = set(result.scalars())
+        if not existing:
+            continue
+        for value in values:
+            if value not in existing:
+                escaped = value.replace("'", "''")
+                conn.exec_driver_sql(f"ALTER TYPE \"{name}\" ADD VALUE IF NOT EXISTS '{escaped}'")
+                added.append(f"{name}.{value}")
+
+    if added:
+        _LOGGER.info("Added enum values: %s", ", ".join(added))
+    return added
+
+
+def _column_ddl(column: Column, conn: Connection) -> str | None:
+    type_sql = column.type.compile(dialect=conn.dialect)
+    ddl = f'"{column.name}" {type_sql}'
+
+    default = column.default.arg if column.default is not None else None
+    if callable(default):
+        default = None
+    if isinstance(default, bool):
+        ddl += " DEFAULT " + ("TRUE" if default else "FALSE")
+    elif isinstance(default, (int, float)):
+        ddl += f" DEFAULT {default}"
+    elif isinstance(default, str):
+        ddl += " DEFAULT '" + default.replace("'", "''") + "'"
+    elif not column.nullable:
+        return None
+
+    if not column.nullable:
+        ddl += " NOT NULL"
+    return ddl
@@ -1,13 +1,19 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from sqlalchemy import text
 
+from app.api.endpoints import metrics
 from app.api.routes import api_router
 from app.core.logging import configure_logging
+from app.core.metrics import MetricsMiddleware
 from app.core.config import get_settings
+from app.db.migrate import add_missing_columns, add_missing_enum_values, add_missing_indexes
 from app.db.session import async_engine
+from app.services.dispatcher import get_dispatcher
 from app.models import *  # noqa: F401,F403
 
 
@@ -42,6 +48,8 @@ def create_app() -> FastAPI:
         cors_kwargs["allow_origin_regex"] = allow_origin_regex
 
     app.add_middleware(CORSMiddleware, **cors_kwargs)
+    # Added last so it is outermost and times the whole request.
+    app.add_middleware(MetricsMiddleware)
 
     # Serve local storage folder for development (optional)
     # Make the directory absolute and stable regardless of process cwd.
@@ -58,6 +66,8 @@ def create_app() -> FastAPI:
         )
 
     app.include_router(api_router, prefix=settings.api_v1_prefix)
+    # Prometheus scrapes /metrics at the root, outside the versioned API.
+    app.include_router(metrics.router)
 
     @app.on_event("startup")
     async def on_startup() -> None:
@@ -79,6 +89,22 @@ def create_app() -> FastAPI:
                 # Do not crash startup due to best-effort migration
                 pass
 
+        # Separate transaction: a failed ALTER must not roll back create_all.
+        try:
+            async with async_engine.begin() as conn:  # type: ignore[call-arg]
+                await conn.run_sync(add_missing_columns)
+                await conn.run_sync(add_missing_indexes)
+                await conn.run_sync(add_missing_enum_values)
+        except Exception:
+            logging.getLogger(__name__).exception("Upgrading the schema failed")
+
+        if settings.task_queue_mode == "background":
+            get_dispatcher().start()
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        await get_dispatcher().stop()
+
     return app
 
 
@@ -3,6 +3,7 @@ from app.models.user import User
 from app.models.image_asset import ImageAsset
 from app.models.processing_task import ProcessingTask, TaskStatus
 from app.models.label_template import LabelTemplate
+from app.models.task_checkpoint import TaskCheckpoint
 
 __all__ = [
     "Tenant",
@@ -11,4 +12,5 @@ __all__ = [
     "ProcessingTask",
     "TaskStatus",
     "LabelTemplate",
+    "TaskCheckpoint",
 ]
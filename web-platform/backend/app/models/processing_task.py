@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING, Optional
@@ -17,6 +18,7 @@ class TaskStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class ProcessingTask(SQLModel, table=True):
@@ -31,6 +33,18 @@ class ProcessingTask(SQLModel, table=True):
     result_path: Optional[str] = Field(default=None)
     config_path: Optional[str] = Field(default=None)
     output_dir: Optional[str] = Field(default=None)
+    # Wall-clock limit of one run; falls back to Settings.task_time_budget_seconds.
+    time_budget_seconds: Optional[int] = Field(default=None)
+
+    # Seconds per pipeline stage, see app.services.stage_timer.
+    timings_json: Optional[str] = Field(default=None)
+    image_count: Optional[int] = Field(default=None)
+    bytes_processed: Optional[int] = Field(default=None)
+
+    # Queue lease, see app.services.queue.
+    attempts: int = Field(default=0, nullable=False)
+    worker_id: Optional[str] = Field(default=None)
+    lease_expires_at: Optional[datetime] = Field(default=None, index=True)
 
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -41,3 +55,9 @@ class ProcessingTask(SQLModel, table=True):
     image_asset: "ImageAsset" = Relationship(
         sa_relationship=relationship("ImageAsset", back_populates="tasks")
     )
+
+    @property
+    def stage_timings(self) -> Optional[dict[str, float]]:
+        if not self.timings_json:
+            return None
+        return json.loads(self.timings_json)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
+
+
+class TaskCheckpoint(SQLModel, table=True):
+    """A tile of a task that was saved and uploaded; resumed runs skip it."""
+
+    __tablename__ = "task_checkpoints"
+    __table_args__ = (UniqueConstraint("task_id", "tile_index"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int = Field(foreign_key="processing_tasks.id", nullable=False, index=True)
+
+    # Position of the source image in the task's input listing.
+    tile_index: int = Field(nullable=False)
+    source: str = Field(nullable=False)
+    # Saved tile, relative to the task's output directory; also its storage
+    # key under the tenant's images.
+    file_name: str = Field(nullable=False)
+    storage_key: str = Field(nullable=False)
+    url: str = Field(nullable=False)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
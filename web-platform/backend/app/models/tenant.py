@@ -23,6 +23,8 @@ class Tenant(SQLModel, table=True):
 
     contact_email: Optional[str] = Field(default=None)
     is_active: bool = Field(default=True)
+    # Share of processing slots relative to other tenants, see app.services.queue.
+    task_weight: int = Field(default=1, nullable=False)
 
     created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
     updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.models.processing_task import TaskStatus
 
@@ -13,6 +13,19 @@ class TaskCreate(BaseModel):
     image_asset_id: int
     config_path: str | None = None
     output_dir: str | None = None
+    time_budget_seconds: int | None = Field(default=None, ge=1)
+
+
+class TaskBatchItem(BaseModel):
+    image_asset_id: int
+    config_path: str | None = None
+    output_dir: str | None = None
+    time_budget_seconds: int | None = Field(default=None, ge=1)
+
+
+class TaskBatchCreate(BaseModel):
+    tenant_id: int
+    tasks: list[TaskBatchItem] = Field(min_length=1, max_length=500)
 
 
 class TaskUpdate(BaseModel):
@@ -30,6 +43,13 @@ class TaskRead(BaseModel):
     result_path: Optional[str]
     config_path: Optional[str]
     output_dir: Optional[str]
+    time_budget_seconds: Optional[int] = None
+    stage_timings: Optional[dict[str, float]] = None
+    image_count: Optional[int] = None
+    bytes_processed: Optional[int] = None
+    attempts: int = 0
+    # 1 for the task dispatched next; None unless the task is waiting.
+    queue_position: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class TenantBase(BaseModel):
@@ -11,6 +11,7 @@ class TenantBase(BaseModel):
     custom_domain: Optional[str] = None
     contact_email: Optional[EmailStr] = None
     is_active: bool = True
+    task_weight: int = Field(default=1, ge=1)
 
 
 class TenantCreate(TenantBase):
@@ -181,16 +181,19 @@ async def main(
         task_id = task["id"]
         print("task_created", task_id, task["status"])
 
-        # 5) poll task
-        for i in range(30):
-            await asyncio.sleep(0.5)
-            t = await client.get(f"{base}/tasks/{task_id}", headers=headers)
-            t.raise_for_status()
-            status = t.json()["status"]
-            print("poll", i, status)
-            if status in ("completed", "failed"):
-                print("final", t.json())
-                break
+        # 5) follow task progress until the server closes the stream
+        async with client.stream(
+            "GET", f"{base}/tasks/{task_id}/events", headers=headers, timeout=None
+        ) as events:
+            events.raise_for_status()
+            async for line in events.aiter_lines():
+                if line.startswith("data:"):
+                    event = json.loads(line[5:])
+                    print("progress", event["stage"], f"{event['done']}/{event['total']}")
+
+        t = await client.get(f"{base}/tasks/{task_id}", headers=headers)
+        t.raise_for_status()
+        print("final", t.json())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+"""Per-image crop detection for ``crop_settings.auto_detect``."""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from app.services.processor import CropConfig
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def detect_subject_crop(
+    image_path: Path | str,
+    *,
+    analysis_size: int = 256,
+    threshold: int = 24,
+    min_fraction: float = 0.01,
+    margin_ratio: float = 0.05,
+) -> Optional[CropConfig]:
+    """Find a square crop around the subject of ``image_path``.
+
+    The image is decoded at reduced scale (JPEG draft mode, or a box
+    reduction for other formats, then a thumbnail of at most
+    ``analysis_size`` pixels) and compared against the background
+    level estimated from the border pixels. Rows and columns in which more
+    than ``min_fraction`` of the pixels differ by over ``threshold`` grey
+    levels form the subject box, which is padded by ``margin_ratio`` and
+    squared because tiles are placed as squares on the slides.
+
+    Returns ``None`` when nothing stands out from the background.
+    """
+
+    with Image.open(image_path) as img:
+        full_width, full_height = img.size
+        img.draft("L", (analysis_size, analysis_size))
+        # Only JPEG decodes at reduced scale; shrink other formats before the
+        # grey conversion so it does not copy the image at full resolution.
+        reduced = img
+        factor = max(img.size) // analysis_size
+        if factor > 1 and img.mode not in ("1", "P") and not img.mode.startswith("I;16"):
+            reduced = img.reduce(factor)
+        small = reduced.convert("L")
+    small.thumbnail((analysis_size, analysis_size), Image.Resampling.BILINEAR)
+
+    pixels = np.asarray(small, dtype=np.int16)
+    border = np.concatenate((pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]))
+    foreground = np.abs(pixels - np.median(border)) > threshold
+
+    rows = np.flatnonzero(foreground.mean(axis=1) > min_fraction)
+    cols = np.flatnonzero(foreground.mean(axis=0) > min_fraction)
+    if rows.size == 0 or cols.size == 0:
+        return None
+
+    scale_x = full_width / small.width
+    scale_y = full_height / small.height
+    left = cols[0] * scale_x
+    right = (cols[-1] + 1) * scale_x
+    top = rows[0] * scale_y
+    bottom = (rows[-1] + 1) * scale_y
+
+    side = max(right - left, bottom - top) * (1 + 2 * margin_ratio)
+    side = int(min(side, max(full_width, full_height)))
+    center_x = (left + right) / 2
+    center_y = (top + bottom) / 2
+
+    # Keep the square inside the image where it fits; crop() pads the rest.
+    crop_left = int(min(max(center_x - side / 2, 0), max(full_width - side, 0)))
+    crop_top = int(min(max(center_y - side / 2, 0), max(full_height - side, 0)))
+    return CropConfig(left=crop_left, top=crop_top, width=side, height=side)
+
+
+class AutoCropProvider:
+    """``crop_config_provider`` that detects a crop for every image.
+
+    Falls back to ``fallback`` when detection finds nothing or fails.
+    """
+
+    def __init__(
+        self,
+        fallback: CropConfig,
+        *,
+        threshold: int = 24,
+        margin_ratio: float = 0.05,
+    ) -> None:
+        self.fallback = fallback
+        self.threshold = threshold
+        self.margin_ratio = margin_ratio
+
+    def __call__(self, image_path: Path | str) -> CropConfig:
+        try:
+            crop = detect_subject_crop(
+                image_path,
+                threshold=self.threshold,
+                margin_ratio=self.margin_ratio,
+            )
+        except Exception:
+            _LOGGER.exception("Crop detection failed for %s", image_path)
+            crop = None
+        if crop is None:
+            _LOGGER.info("No subject found in %s, using uniform crop", image_path)
+            return self.fallback
+        return crop
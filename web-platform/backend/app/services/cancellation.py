@@ -0,0 +1,98 @@
+"""Cooperative cancellation and wall-clock budgets of running tasks."""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+
+from app.models import ProcessingTask, TaskStatus
+from app.services.queue import Lease
+
+# The task row is read at most this often, so checking between every image
+# costs little.
+_POLL_SECONDS = 1.0
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task that has to stop; ``status`` is its final status."""
+
+    def __init__(self, status: TaskStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class LeaseLost(Exception):
+    """Raised inside a task whose lease another worker took over.
+
+    The task row belongs to the new run, so the stopped run must not write
+    to it.
+    """
+
+
+class CancellationCheck:
+    """Decide whether a running task should stop.
+
+    ``check`` is awaited between images and stages. It raises
+    ``TaskCancelled`` once the task was cancelled through the API, which sets
+    its status to ``CANCELLED``, or once it has run for longer than
+    ``budget_seconds``. With a ``lease`` it raises ``LeaseLost`` as soon as the
+    heartbeat failed or the task is held by another worker.
+    """
+
+    def __init__(
+        self,
+        task_id: int,
+        budget_seconds: Optional[float],
+        session_factory: Optional[async_sessionmaker] = None,
+        lease: Optional[Lease] = None,
+    ) -> None:
+        if session_factory is None:
+            from app.db.session import async_session as session_factory
+
+        self.task_id = task_id
+        self.budget_seconds = budget_seconds
+        self.lease = lease
+        self._session_factory = session_factory
+        self._started = time.monotonic()
+        self._polled = self._started
+
+    async def check(self) -> None:
+        now = time.monotonic()
+        if self.budget_seconds and now - self._started > self.budget_seconds:
+            raise TaskCancelled(
+                TaskStatus.FAILED, f"Time budget of {self.budget_seconds:g}s exceeded"
+            )
+        lost = self.lease is not None and self.lease.lost
+        if not lost and now - self._polled < _POLL_SECONDS:
+            return
+        self._polled = now
+        status, worker_id = await self._read()
+        if status == TaskStatus.CANCELLED:
+            raise TaskCancelled(TaskStatus.CANCELLED, "Cancelled")
+        if self.lease is not None and (
+            lost or status != TaskStatus.PROCESSING or worker_id != self.lease.worker_id
+        ):
+            self.lease.lost = True
+            raise LeaseLost(f"Task is held by {worker_id or 'no worker'}")
+
+    async def lease_lost(self) -> bool:
+        """Whether another worker took the task over, read from the database."""
+
+        if self.lease is None:
+            return False
+        if not self.lease.lost:
+            _, worker_id = await self._read()
+            self.lease.lost = worker_id != self.lease.worker_id
+        return self.lease.lost
+
+    async def _read(self) -> tuple[Optional[TaskStatus], Optional[str]]:
+        async with self._session_factory() as session:
+            result = await session.exec(
+                select(ProcessingTask.status, ProcessingTask.worker_id).where(
+                    ProcessingTask.id == self.task_id
+                )
+            )
+            return result.first() or (None, None)
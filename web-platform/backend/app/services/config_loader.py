@@ -2,8 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 
+from app.services.auto_crop import AutoCropProvider
+from app.services.encoding import EncodingProfile, resolve_profile
 from app.services.processor import CropConfig, ImageProcessingSettings
 
 
@@ -27,6 +29,10 @@ class LegacyConfig:
     def ppt_settings(self) -> dict[str, Any]:
         return self.raw.get("ppt_settings", {})
 
+    @property
+    def output_settings(self) -> dict[str, Any]:
+        return self.raw.get("output_settings", {})
+
     def uniform_crop(self) -> CropConfig:
         uniform = self.crop_settings.get("uniform_crop", {})
         return CropConfig(
@@ -36,12 +42,29 @@ class LegacyConfig:
             height=int(uniform.get("height", 0)),
         )
 
+    def crop_provider(self) -> Callable[[Path | str], CropConfig]:
+        uniform = self.uniform_crop()
+        if not self.crop_settings.get("auto_detect", False):
+            return lambda path: uniform
+
+        return AutoCropProvider(
+            uniform,
+            threshold=int(self.crop_settings.get("auto_detect_threshold", 24)),
+            margin_ratio=float(self.crop_settings.get("auto_detect_margin", 0.05)),
+        )
+
+    def encoding_profile(self) -> EncodingProfile:
+        options = dict(self.output_settings)
+        return resolve_profile(options.pop("encoding", None), options)
+
     def ppt_layout(self) -> Dict[str, Any]:
         return {
             "columns": int(self.ppt_settings.get("columns", 4)),
             "rows": int(self.ppt_settings.get("rows", 2)),
             "column_spacing_cm": float(self.ppt_settings.get("column_spacing_cm", 0.2)),
             "row_spacing_cm": float(self.ppt_settings.get("row_spacing_cm", 0.2)),
+            # 0 keeps the whole deck in one file.
+            "slides_per_part": int(self.ppt_settings.get("slides_per_part", 0)),
         }
 
 
@@ -58,6 +81,8 @@ def to_processing_settings(config: LegacyConfig) -> ImageProcessingSettings:
 
     size_cm = float(image_settings.get("size_cm", 5.0))
     dpi = int(image_settings.get("dpi", 300))
+    fast_downscale = bool(image_settings.get("fast_downscale", False))
+    region_read = bool(image_settings.get("region_read", False))
 
     labels = label_settings.get("sample_labels", {})
     font_color = label_settings.get("font_color", "#000000")
@@ -81,4 +106,6 @@ def to_processing_settings(config: LegacyConfig) -> ImageProcessingSettings:
         size_cm=size_cm,
         corner_radius_ratio=corner_radius,
         label_config=label_config,
+        fast_downscale=fast_downscale,
+        region_read=region_read,
     )
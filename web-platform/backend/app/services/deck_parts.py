@@ -0,0 +1,172 @@
+"""Decks split into parts of a fixed number of slides, built in parallel."""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from app.services.deck_writer import StreamingDeckWriter
+from app.services.processor import ImageProcessingSettings
+
+_LOGGER = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+@dataclass(slots=True)
+class DeckPart:
+    index: int
+    name: str
+    first_slide: int
+    last_slide: int
+    image_count: int
+    url: Optional[str] = None
+
+
+# (PNG path, label filename, delete the PNG once the part is written)
+_Picture = tuple[str, str, bool]
+
+
+def build_deck_part(
+    pictures: list[_Picture],
+    settings: ImageProcessingSettings,
+    layout: dict[str, Any],
+    output_path: str,
+) -> str:
+    """Write one deck from the PNG files in ``pictures``."""
+
+    output = Path(output_path)
+    deck = StreamingDeckWriter(
+        settings,
+        layout["columns"],
+        layout["rows"],
+        layout["column_spacing_cm"],
+        layout["row_spacing_cm"],
+        spool_dir=output.parent,
+    )
+    try:
+        for picture_path, filename, _ in pictures:
+            with open(picture_path, "rb") as picture:
+                deck.add_picture(picture, filename)
+        deck.save(output)
+    except BaseException:
+        deck.discard()
+        raise
+
+    for picture_path, _, temporary in pictures:
+        if temporary:
+            Path(picture_path).unlink(missing_ok=True)
+    return output_path
+
+
+class DeckPartBuilder:
+    """Build ``slides_per_part`` slide decks in worker processes.
+
+    Pictures are added as their PNG files are written; a part is submitted
+    as soon as it has all its pictures, so early parts finish while later
+    images are still being processed.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        settings: ImageProcessingSettings,
+        layout: dict[str, Any],
+        slides_per_part: int,
+        max_workers: int = 2,
+        stem: str = "output",
+    ) -> None:
+        self.output_dir = output_dir
+        self.settings = settings
+        self.layout = layout
+        self.stem = stem
+        self.images_per_slide = layout["columns"] * layout["rows"]
+        self.images_per_part = slides_per_part * self.images_per_slide
+        self.parts: list[DeckPart] = []
+
+        self._pictures: list[_Picture] = []
+        self._temporary: list[str] = []
+        self._pending: dict[Future[str], DeckPart] = {}
+        # Spawn for the same reason as the image processing pool.
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def add(self, picture_path: Path | str, filename: str, temporary: bool = False) -> None:
+        self._pictures.append((str(picture_path), filename, temporary))
+        if temporary:
+            self._temporary.append(str(picture_path))
+        if len(self._pictures) >= self.images_per_part:
+            self._submit()
+
+    def completed(self) -> list[DeckPart]:
+        """Parts finished since the last call, without blocking."""
+
+        done = [future for future in self._pending if future.done()]
+        return [self._collect(future) for future in done]
+
+    def finish(self) -> Iterator[DeckPart]:
+        """Submit the last part and yield the remaining parts as they finish."""
+
+        if self._pictures:
+            self._submit()
+        while self._pending:
+            done, _ = wait(self._pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield self._collect(future)
+
+    def path(self, part: DeckPart) -> Path:
+        return self.output_dir / part.name
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def discard(self) -> None:
+        """Stop building and delete the temporary PNGs of unbuilt parts."""
+
+        self.close()
+        for picture_path in self._temporary:
+            Path(picture_path).unlink(missing_ok=True)
+
+    def manifest(self, complete: bool) -> dict[str, Any]:
+        parts = sorted(self.parts, key=lambda part: part.index)
+        return {
+            "version": MANIFEST_VERSION,
+            "complete": complete,
+            "slides_per_part": self.images_per_part // self.images_per_slide,
+            "total_slides": sum(part.last_slide - part.first_slide + 1 for part in parts),
+            "total_images": sum(part.image_count for part in parts),
+            "parts": [asdict(part) for part in parts],
+        }
+
+    def _submit(self) -> None:
+        index = len(self.parts) + len(self._pending) + 1
+        first_slide = (index - 1) * (self.images_per_part // self.images_per_slide) + 1
+        slides = -(-len(self._pictures) // self.images_per_slide)
+        part = DeckPart(
+            index=index,
+            name=f"{self.stem}_part{index:03}.pptx",
+            first_slide=first_slide,
+            last_slide=first_slide + slides - 1,
+            image_count=len(self._pictures),
+        )
+        future = self._executor.submit(
+            build_deck_part,
+            self._pictures,
+            self.settings,
+            self.layout,
+            str(self.output_dir / part.name),
+        )
+        self._pending[future] = part
+        self._pictures = []
+
+    def _collect(self, future: Future[str]) -> DeckPart:
+        part = self._pending.pop(future)
+        future.result()
+        self.parts.append(part)
+        _LOGGER.info("Built deck part %s (%s images)", part.name, part.image_count)
+        return part
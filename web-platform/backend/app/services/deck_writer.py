@@ -0,0 +1,283 @@
+"""Constant-memory PPTX writer for large decks."""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import tempfile
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import IO
+from xml.sax.saxutils import escape
+
+from lxml import etree
+from pptx import Presentation
+from pptx.enum.text import PP_ALIGN
+from pptx.util import Cm
+
+from app.services.processor import ImageProcessingSettings, SlideGrid
+
+_NS_P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+_NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_NS_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_NS_TYPES = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+_RT_SLIDE = f"{_NS_R}/slide"
+_RT_LAYOUT = f"{_NS_R}/slideLayout"
+_RT_IMAGE = f"{_NS_R}/image"
+_CT_SLIDE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+
+_XML_HEADER = "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+_BLANK_LAYOUT_INDEX = 6
+
+# python-pptx writes these as "_x0007_" style escapes.
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0B-\x1F]")
+# Not representable in XML at all; python-pptx refuses them.
+_INVALID_XML_CHARS = re.compile("[\ud800-\udfff\ufffe\uffff]")
+
+
+def _emu(cm: float) -> int:
+    return int(Cm(cm))
+
+
+def _label_paragraphs(text: str) -> tuple[str, str]:
+    """Runs of the first paragraph and the XML of the following ones.
+
+    Matches ``TextFrame.text``: "\\n" starts a paragraph, "\\v" is a line
+    break and other control characters are escaped.
+    """
+
+    first, *others = text.split("\n")
+    rest = "".join(
+        f"<a:p>{runs}</a:p>" if (runs := _label_runs(line)) else "<a:p/>" for line in others
+    )
+    return _label_runs(first), rest
+
+
+def _label_runs(line: str) -> str:
+    parts = []
+    for index, run in enumerate(line.split("\v")):
+        if index:
+            parts.append("<a:br/>")
+        if run:
+            run = _CONTROL_CHARS.sub(lambda match: "_x%04X_" % ord(match.group()), run)
+            parts.append(f"<a:r><a:t>{escape(_INVALID_XML_CHARS.sub('', run))}</a:t></a:r>")
+    return "".join(parts)
+
+
+@lru_cache
+def _package_skeleton(slide_width_cm: float, slide_height_cm: float) -> tuple[dict[str, bytes], str]:
+    """Parts of an empty deck from the python-pptx default template.
+
+    Returns the parts by name and the part name of the blank slide layout.
+    """
+
+    prs = Presentation()
+    prs.slide_width = Cm(slide_width_cm)
+    prs.slide_height = Cm(slide_height_cm)
+    layout = prs.slide_layouts[_BLANK_LAYOUT_INDEX].part.partname
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        parts = {name: package.read(name) for name in package.namelist()}
+    return parts, layout
+
+
+class StreamingDeckWriter(SlideGrid):
+    """Build a deck by streaming parts into a zip spooled to disk.
+
+    Each picture is written to the package as soon as it is added and each
+    slide once it is full, so memory use does not grow with the deck. The
+    package is completed and moved to its destination by ``save``. Produces
+    the same slides as ``DeckBuilder``, labels included.
+    """
+
+    def __init__(
+        self,
+        settings: ImageProcessingSettings,
+        columns: int,
+        rows: int,
+        column_spacing_cm: float,
+        row_spacing_cm: float,
+        spool_dir: Path | None = None,
+    ) -> None:
+        super().__init__(settings, columns, rows, column_spacing_cm, row_spacing_cm)
+        fd, spool_name = tempfile.mkstemp(suffix=".pptx.part", dir=spool_dir)
+        os.close(fd)
+        self._spool = Path(spool_name)
+        self._zip = zipfile.ZipFile(self._spool, "w", zipfile.ZIP_DEFLATED)
+
+        self._parts, layout = _package_skeleton(self.slide_width_cm, self.slide_height_cm)
+        self._layout_target = "../slideLayouts/" + layout.rsplit("/", 1)[1]
+        self._slides = 0
+        self._shapes: list[str] = []
+        self._rels: list[str] = []
+
+        # Shape XML only differs between pictures in ids, relationship and
+        # label text, so it is rendered once per grid cell and label box and
+        # then stamped with ``str.format``.
+        self._picture_templates = [
+            self._picture_template(*self.cell(position))
+            for position in range(self.images_per_slide)
+        ]
+        self._label_templates: dict[tuple[float, float, PP_ALIGN], str] = {}
+
+    def add_picture(self, image_stream: IO[bytes], filename: str) -> None:
+        index = self.count
+        self.count += 1
+        position = index % self.images_per_slide
+        if position == 0:
+            self._flush_slide()
+            self._slides += 1
+
+        # PNG data is already compressed; deflating it again only costs CPU.
+        media_name = f"image{index + 1}.png"
+        self._zip.writestr(
+            f"ppt/media/{media_name}",
+            image_stream.read(),
+            compress_type=zipfile.ZIP_STORED,
+        )
+        rel_id = f"rId{len(self._rels) + 2}"
+        self._rels.append(
+            f'<Relationship Id="{rel_id}" Type="{_RT_IMAGE}" Target="../media/{media_name}"/>'
+        )
+
+        shape_id = len(self._shapes) + 2
+        self._shapes.append(
+            self._picture_templates[position].format(
+                shape_id=shape_id, name_id=shape_id - 1, rel_id=rel_id
+            )
+        )
+
+        left_cm, top_cm = self.cell(index)
+        for label_text, x_pos, y_pos, align in self.label_boxes(left_cm, top_cm, filename):
+            template = self._label_templates.get((x_pos, y_pos, align))
+            if template is None:
+                template = self._label_template(x_pos, y_pos, align)
+                self._label_templates[(x_pos, y_pos, align)] = template
+            shape_id = len(self._shapes) + 2
+            runs, paragraphs = _label_paragraphs(label_text)
+            self._shapes.append(
+                template.format(
+                    shape_id=shape_id, name_id=shape_id - 1, runs=runs, paragraphs=paragraphs
+                )
+            )
+
+    def _picture_template(self, left_cm: float, top_cm: float) -> str:
+        size = _emu(self.img_size_cm)
+        return (
+            '<p:pic><p:nvPicPr><p:cNvPr id="{shape_id}" name="Picture {name_id}" '
+            'descr="image.png"/>'
+            '<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+            '<p:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+            f'<p:spPr><a:xfrm><a:off x="{_emu(left_cm)}" y="{_emu(top_cm)}"/>'
+            f'<a:ext cx="{size}" cy="{size}"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+        )
+
+    def _label_template(self, x_pos: float, y_pos: float, align: PP_ALIGN) -> str:
+        algn = "l" if align == PP_ALIGN.LEFT else "r"
+        return (
+            '<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="TextBox {name_id}"/>'
+            '<p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr><a:xfrm><a:off x="{_emu(x_pos)}" y="{_emu(y_pos)}"/>'
+            f'<a:ext cx="{_emu(self.textbox_width_cm)}" cy="{_emu(self.textbox_height_cm)}"/></a:xfrm>'
+            '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom>'
+            '<a:solidFill><a:srgbClr val="FFFFFF"/></a:solidFill><a:ln><a:noFill/></a:ln></p:spPr>'
+            '<p:txBody><a:bodyPr wrap="none"><a:spAutoFit/></a:bodyPr><a:lstStyle/>'
+            f'<a:p><a:pPr algn="{algn}"><a:defRPr sz="{self.font_size_pt.centipoints}" b="1">'
+            f'<a:solidFill><a:srgbClr val="{self.font_color_rgb}"/></a:solidFill></a:defRPr></a:pPr>'
+            "{runs}</a:p>{paragraphs}</p:txBody></p:sp>"
+        )
+
+    def save(self, path: Path) -> None:
+        self._flush_slide()
+        for name, data in self._finish_parts().items():
+            self._zip.writestr(name, data)
+        self._zip.close()
+        os.replace(self._spool, path)
+
+    def discard(self) -> None:
+        """Drop the partially written package."""
+
+        self._zip.close()
+        self._spool.unlink(missing_ok=True)
+
+    def _flush_slide(self) -> None:
+        if not self._slides:
+            return
+
+        slide = (
+            f'{_XML_HEADER}<p:sld xmlns:a="{_NS_A}" xmlns:p="{_NS_P}" xmlns:r="{_NS_R}">'
+            '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/>'
+            "</p:nvGrpSpPr><p:grpSpPr/>"
+            + "".join(self._shapes)
+            + "</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>"
+        )
+        rels = (
+            f'{_XML_HEADER}<Relationships xmlns="{_NS_RELS}">'
+            f'<Relationship Id="rId1" Type="{_RT_LAYOUT}" Target="{self._layout_target}"/>'
+            + "".join(self._rels)
+            + "</Relationships>"
+        )
+        self._zip.writestr(f"ppt/slides/slide{self._slides}.xml", slide)
+        self._zip.writestr(f"ppt/slides/_rels/slide{self._slides}.xml.rels", rels)
+        self._shapes = []
+        self._rels = []
+
+    def _finish_parts(self) -> dict[str, bytes]:
+        """Template parts with the written slides registered in them."""
+
+        parts = dict(self._parts)
+
+        rels = etree.fromstring(parts["ppt/_rels/presentation.xml.rels"])
+        next_id = 1 + max(
+            int(rel.get("Id")[3:]) for rel in rels if rel.get("Id", "").startswith("rId")
+        )
+        presentation = etree.fromstring(parts["ppt/presentation.xml"])
+        slide_list = presentation.find(f"{{{_NS_P}}}sldIdLst")
+        if slide_list is None:
+            slide_list = etree.Element(f"{{{_NS_P}}}sldIdLst")
+            anchor = presentation.find(f"{{{_NS_P}}}sldSz")
+            anchor.addprevious(slide_list)
+        types = etree.fromstring(parts["[Content_Types].xml"])
+        if not any(item.get("Extension") == "png" for item in types):
+            etree.SubElement(
+                types, f"{{{_NS_TYPES}}}Default", Extension="png", ContentType="image/png"
+            )
+
+        for number in range(1, self._slides + 1):
+            rel_id = f"rId{next_id}"
+            next_id += 1
+            etree.SubElement(
+                rels,
+                f"{{{_NS_RELS}}}Relationship",
+                Id=rel_id,
+                Type=_RT_SLIDE,
+                Target=f"slides/slide{number}.xml",
+            )
+            etree.SubElement(
+                slide_list,
+                f"{{{_NS_P}}}sldId",
+                {"id": str(255 + number), f"{{{_NS_R}}}id": rel_id},
+            )
+            etree.SubElement(
+                types,
+                f"{{{_NS_TYPES}}}Override",
+                PartName=f"/ppt/slides/slide{number}.xml",
+                ContentType=_CT_SLIDE,
+            )
+
+        for name, element in (
+            ("ppt/_rels/presentation.xml.rels", rels),
+            ("ppt/presentation.xml", presentation),
+            ("[Content_Types].xml", types),
+        ):
+            parts[name] = etree.tostring(
+                element, xml_declaration=True, encoding="UTF-8", standalone=True
+            )
+        return parts
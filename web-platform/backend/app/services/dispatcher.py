@@ -0,0 +1,86 @@
+"""Run queued tasks inside the API process (``TASK_QUEUE_MODE=background``)."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import Optional
+
+from app.core.config import get_settings
+from app.services.queue import claim_next_task, worker_identity
+from app.services.tasks import run_claimed_task
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TaskDispatcher:
+    """Claim tasks through the fair queue and run them as asyncio tasks.
+
+    New tasks call ``notify`` so they start without waiting for the next
+    poll; polling still picks up slots freed by other processes and expired
+    leases.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None) -> None:
+        self.worker_id = worker_id or worker_identity()
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.Task] = None
+        self._running: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        # Interrupted tasks are released with an expired lease and resume from
+        # their checkpoints on the next claim.
+        tasks = [task for task in (self._loop, *self._running) if task is not None]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._loop = None
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    async def _dispatch(self) -> None:
+        from app.db.session import async_session
+
+        settings = get_settings()
+        while True:
+            self._wake.clear()
+            task_id = None
+            if len(self._running) < settings.max_concurrent_tasks:
+                try:
+                    async with async_session() as session:  # type: ignore[call-arg]
+                        task_id = await claim_next_task(session, self.worker_id)
+                except Exception:
+                    _LOGGER.exception("Claiming a task failed")
+
+            if task_id is not None:
+                task = asyncio.create_task(run_claimed_task(task_id, self.worker_id))
+                self._running.add(task)
+                task.add_done_callback(self._finished)
+                continue
+
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.worker_poll_seconds)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error("Task runner crashed", exc_info=task.exception())
+        self._wake.set()
+
+
+_DISPATCHER: Optional[TaskDispatcher] = None
+
+
+def get_dispatcher() -> TaskDispatcher:
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        _DISPATCHER = TaskDispatcher()
+    return _DISPATCHER
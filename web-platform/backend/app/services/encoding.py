@@ -0,0 +1,166 @@
+"""Output encoding profiles for processed tiles."""
+
+from __future__ import annotations
+
+import io
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from PIL import Image
+
+from app.services.processor import ProcessedTile
+
+
+@dataclass(frozen=True, slots=True)
+class EncodingProfile:
+    name: str
+    format: str
+    extension: str
+    content_type: str
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class EncodedImage:
+    data: bytes
+    profile: EncodingProfile
+    encode_seconds: float
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+@dataclass(slots=True)
+class EncodedTile:
+    """Encoded output of one processed tile.
+
+    ``deck_data`` is the PNG placed in the deck; it is ``encoded.data`` itself
+    whenever the output profile is PNG.
+    """
+
+    index: int
+    source: Path | str
+    encoded: EncodedImage
+    deck_data: bytes
+
+
+PROFILES: dict[str, EncodingProfile] = {
+    # Smallest PNGs, slowest to encode. Matches the historical output.
+    "png_optimized": EncodingProfile(
+        name="png_optimized",
+        format="PNG",
+        extension=".png",
+        content_type="image/png",
+        options={"optimize": True},
+    ),
+    # Low zlib level: several times faster than optimize for larger files.
+    "png_fast": EncodingProfile(
+        name="png_fast",
+        format="PNG",
+        extension=".png",
+        content_type="image/png",
+        options={"compress_level": 1},
+    ),
+    # Lossless WebP for web previews; not embeddable in PPTX.
+    "webp_lossless": EncodingProfile(
+        name="webp_lossless",
+        format="WEBP",
+        extension=".webp",
+        content_type="image/webp",
+        options={"lossless": True, "quality": 50, "method": 2},
+    ),
+}
+
+DEFAULT_PROFILE = "png_optimized"
+
+# Options that may be overridden from the legacy config, per format.
+_TUNABLE_OPTIONS = {
+    "PNG": {"compress_level": int},
+    "WEBP": {"quality": int, "method": int},
+}
+
+
+def resolve_profile(name: str | None, overrides: dict[str, Any] | None = None) -> EncodingProfile:
+    profile = PROFILES.get(name or DEFAULT_PROFILE)
+    if profile is None:
+        raise ValueError(f"Unknown encoding profile: {name}")
+
+    tunable = _TUNABLE_OPTIONS.get(profile.format, {})
+    options = dict(profile.options)
+    for key, value in (overrides or {}).items():
+        if key in tunable:
+            options[key] = tunable[key](value)
+    if "compress_level" in options:
+        # An explicit zlib level only applies without optimize.
+        options.pop("optimize", None)
+    return replace(profile, options=options)
+
+
+def encode_image(image: Image.Image, profile: EncodingProfile) -> EncodedImage:
+    buffer = io.BytesIO()
+    started = time.perf_counter()
+    image.save(buffer, format=profile.format, **profile.options)
+    elapsed = time.perf_counter() - started
+    return EncodedImage(data=buffer.getvalue(), profile=profile, encode_seconds=elapsed)
+
+
+def deck_profile(profile: EncodingProfile) -> EncodingProfile:
+    """Profile used for the PPTX copy of a tile encoded with ``profile``.
+
+    PowerPoint needs PNG; when the output profile already is PNG the same
+    bytes are shared, otherwise a fast PNG is encoded for the deck.
+    """
+
+    if profile.format == "PNG":
+        return profile
+    return PROFILES["png_fast"]
+
+
+def encode_tile(image: Image.Image, profile: EncodingProfile) -> tuple[EncodedImage, bytes]:
+    encoded = encode_image(image, profile)
+    deck_encoding = deck_profile(profile)
+    if deck_encoding is profile:
+        return encoded, encoded.data
+    return encoded, encode_image(image, deck_encoding).data
+
+
+def encode_tiles(
+    tiles: Iterable[ProcessedTile],
+    profile: EncodingProfile,
+    max_workers: int = 4,
+) -> Iterator[EncodedTile]:
+    """Encode tiles concurrently, yielding them in input order.
+
+    Pillow releases the GIL while compressing, so a thread pool encodes
+    ``max_workers`` tiles in parallel. At most ``2 * max_workers`` tiles are
+    held at once and each tile image is closed as soon as it is encoded.
+    """
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tile-encoder")
+    pending: deque[tuple[ProcessedTile, Future[tuple[EncodedImage, bytes]]]] = deque()
+    try:
+        for tile in tiles:
+            pending.append((tile, executor.submit(encode_tile, tile.image, profile)))
+            if len(pending) >= 2 * max_workers:
+                yield _collect(*pending.popleft())
+        while pending:
+            yield _collect(*pending.popleft())
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _collect(
+    tile: ProcessedTile, future: Future[tuple[EncodedImage, bytes]]
+) -> EncodedTile:
+    try:
+        encoded, deck_data = future.result()
+    finally:
+        tile.image.close()
+    return EncodedTile(
+        index=tile.index, source=tile.source, encoded=encoded, deck_data=deck_data
+    )
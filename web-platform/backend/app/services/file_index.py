@@ -0,0 +1,98 @@
+"""Cached listing of the images in an asset directory."""
+
+from __future__ import annotations
+
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Iterable
+
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".tif", ".tiff"})
+
+_MAX_DIRECTORIES = 256
+# Filesystems with coarse timestamps may not bump the mtime of a directory
+# changed right after a scan; listings that recent are not trusted.
+_MTIME_GRANULARITY_NS = 2_000_000_000
+
+_DIGITS = re.compile(r"(\d+)")
+
+
+def natural_key(name: str) -> tuple:
+    """Sort key ordering ``img2`` before ``img10``, ignoring case."""
+
+    return tuple(
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in _DIGITS.split(name.casefold())
+    )
+
+
+@dataclass(slots=True)
+class _Manifest:
+    mtime_ns: int
+    files: tuple[str, ...]
+
+
+class FileIndex:
+    """Image listings of directories, rescanned only when they change.
+
+    A directory is read with a single ``os.scandir`` pass, matching
+    extensions case-insensitively, and the naturally sorted result is kept
+    until the directory's mtime changes. Adding, removing or renaming a file
+    updates the mtime of its directory; rewriting a file in place does not,
+    but the listing stays the same.
+    """
+
+    def __init__(self, max_directories: int = _MAX_DIRECTORIES) -> None:
+        self.max_directories = max_directories
+        self._manifests: OrderedDict[tuple[str, frozenset[str]], _Manifest] = OrderedDict()
+        self._lock = Lock()
+
+    def files(self, directory: Path | str, extensions: Iterable[str] | None = None) -> list[str]:
+        suffixes = frozenset(ext.lower() for ext in (extensions or IMAGE_EXTENSIONS))
+        key = (os.path.abspath(directory), suffixes)
+        mtime_ns = os.stat(key[0]).st_mtime_ns
+
+        with self._lock:
+            manifest = self._manifests.get(key)
+            if manifest is not None and manifest.mtime_ns == mtime_ns:
+                self._manifests.move_to_end(key)
+                return list(manifest.files)
+
+        scanned_at = time.time_ns()
+        files = _scan(key[0], suffixes)
+        if scanned_at - mtime_ns > _MTIME_GRANULARITY_NS:
+            with self._lock:
+                self._manifests[key] = _Manifest(mtime_ns, tuple(files))
+                self._manifests.move_to_end(key)
+                while len(self._manifests) > self.max_directories:
+                    self._manifests.popitem(last=False)
+        return files
+
+    def clear(self) -> None:
+        with self._lock:
+            self._manifests.clear()
+
+
+def _scan(directory: str, suffixes: frozenset[str]) -> list[str]:
+    entries = []
+    with os.scandir(directory) as iterator:
+        for entry in iterator:
+            if os.path.splitext(entry.name)[1].lower() not in suffixes:
+                continue
+            if entry.is_file():
+                entries.append((natural_key(entry.name), entry.path))
+    entries.sort()
+    return [path for _, path in entries]
+
+
+_INDEX = FileIndex()
+
+
+def list_image_files(directory: Path | str, extensions: Iterable[str] | None = None) -> list[str]:
+    """Paths of the images directly inside ``directory``, naturally sorted."""
+
+    return _INDEX.files(directory, extensions)
@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import copy
 import io
 import json
 import logging
+import math
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Callable, Iterable, Sequence
+from typing import IO, TYPE_CHECKING, Any, Callable, Iterable, Iterator, Optional, Sequence
 
 import numpy as np
 from PIL import Image, ImageDraw
@@ -16,6 +22,12 @@ from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 from pptx.util import Cm, Pt
 
+from app.services.file_index import list_image_files
+from app.services.tile_transport import TileTransport, discard_tile, export_tile, import_tile
+
+if TYPE_CHECKING:  # pragma: no cover
+    from app.services.tile_cache import TileCache
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -33,6 +45,35 @@ class ImageProcessingSettings:
     size_cm: float
     corner_radius_ratio: float
     label_config: dict[str, str]
+    fast_downscale: bool = False
+    region_read: bool = False
+
+
+@dataclass(slots=True)
+class DownscaleQuality:
+    """Difference between the fast downscale path and the reference path."""
+
+    psnr: float
+    mean_abs_diff: float
+    max_abs_diff: int
+
+
+# Keep at least this much oversampling for the final LANCZOS pass when
+# shrinking with JPEG draft decoding or integer reduce().
+_REDUCING_GAP = 2.0
+
+# A batch almost always shares one output size and radius, so a handful of
+# cached masks covers every image.
+_MASK_CACHE_SIZE = 32
+
+
+@dataclass(slots=True)
+class ProcessedTile:
+    """A processed image together with its position in the input batch."""
+
+    index: int
+    source: Path | str
+    image: Image.Image
 
 
 class ImageProcessingError(Exception):
@@ -75,11 +116,24 @@ def create_rounded_rectangle_mask(
     return mask
 
 
+@lru_cache(maxsize=_MASK_CACHE_SIZE)
+def _corner_mask(width: int, height: int, corner_radius_ratio: float) -> Image.Image:
+    """Binary mask of the pixels cut away by the rounded corners.
+
+    Shared between calls, so it must not be modified by callers.
+    """
+
+    mask = create_rounded_rectangle_mask(width, height, corner_radius_ratio)
+    return mask.point(lambda value: 0 if value > 128 else 255)
+
+
 def crop_image_to_rounded_rectangle(
     image_path: Path | str,
     crop_coords: CropConfig,
     output_size_px: int,
     corner_radius_ratio: float,
+    fast_downscale: bool = False,
+    region_read: bool = False,
 ) -> Image.Image:
     img = Image.open(image_path)
     left, top, width, height = (
@@ -88,66 +142,327 @@ def crop_image_to_rounded_rectangle(
         crop_coords.width,
         crop_coords.height,
     )
-    cropped = img.crop((left, top, left + width, top + height))
-    crop_width, crop_height = cropped.size
+    box = (left, top, left + width, top + height)
 
-    if crop_width >= crop_height:
+    if width >= height:
         output_width = output_size_px
-        output_height = int(crop_height * output_size_px / crop_width)
+        output_height = int(height * output_size_px / width)
     else:
         output_height = output_size_px
-        output_width = int(crop_width * output_size_px / crop_height)
-
-    resized = cropped.resize((output_width, output_height), Image.Resampling.LANCZOS)
+        output_width = int(width * output_size_px / height)
+
+    if region_read:
+        # The fast path resamples across the box edges, so keep enough of
+        # the surrounding pixels for the LANCZOS support.
+        ratio = max(width / output_width, height / output_height)
+        margin = math.ceil(4 * ratio) if fast_downscale else 0
+        window = _read_region(img, box, margin)
+        if window is not None:
+            img, (x0, y0) = window
+            box = (left - x0, top - y0, left - x0 + width, top - y0 + height)
+
+    if fast_downscale:
+        resized = _downscale_region(img, box, (output_width, output_height))
+    else:
+        cropped = img.crop(box)
+        resized = cropped.resize(
+            (output_width, output_height), Image.Resampling.LANCZOS
+        )
 
     if corner_radius_ratio <= 0:
         if resized.mode != "RGBA":
             resized = resized.convert("RGBA")
         return resized
 
-    mask = create_rounded_rectangle_mask(
-        output_width, output_height, corner_radius_ratio
-    )
     if resized.mode != "RGBA":
         resized = resized.convert("RGBA")
 
-    resized_arr = np.array(resized, dtype=np.uint8)
-    mask_arr = np.array(mask, dtype=np.uint8)
-    if mask_arr.shape != (output_height, output_width):
-        mask = mask.resize((output_width, output_height), Image.Resampling.NEAREST)
-        mask_arr = np.array(mask, dtype=np.uint8)
+    # ``resized`` is a fresh image owned by this call, so the corners can be
+    # cleared in place instead of compositing into a new buffer.
+    resized.paste(
+        (0, 0, 0, 0),
+        (0, 0, output_width, output_height),
+        _corner_mask(output_width, output_height, corner_radius_ratio),
+    )
+    return resized
+
+
+def _read_region(
+    img: Image.Image, box: tuple[int, int, int, int], margin: int = 0
+) -> tuple[Image.Image, tuple[int, int]] | None:
+    """Restrict a TIFF to the strips or tiles overlapping ``box``.
+
+    ``img`` is shrunk in place to the window covered by those tiles, so that
+    loading it only allocates and decodes that window. Returns the image and
+    the window origin, or ``None`` when the file cannot be read partially
+    (other formats, compressed TIFFs decoded through libtiff) and the caller
+    has to decode the whole raster.
+    """
+
+    if img.format != "TIFF" or getattr(img, "use_load_libtiff", True):
+        return None
+    if not img.tile or any(tile[0] != "raw" for tile in img.tile):
+        return None
+
+    left, top = box[0] - margin, box[1] - margin
+    right, bottom = box[2] + margin, box[3] + margin
+    overlapping = [
+        tile
+        for tile in img.tile
+        if tile[1][0] < right
+        and tile[1][2] > left
+        and tile[1][1] < bottom
+        and tile[1][3] > top
+    ]
+    if not overlapping:
+        return None
+
+    x0 = min(tile[1][0] for tile in overlapping)
+    y0 = min(tile[1][1] for tile in overlapping)
+    x1 = max(tile[1][2] for tile in overlapping)
+    y1 = max(tile[1][3] for tile in overlapping)
+    img.tile = [_shift_tile(tile, x0, y0) for tile in overlapping]
+    img._size = (x1 - x0, y1 - y0)
+    return img, (x0, y0)
+
+
+def _shift_tile(tile, dx: int, dy: int):
+    ex0, ey0, ex1, ey1 = tile[1]
+    extents = (ex0 - dx, ey0 - dy, ex1 - dx, ey1 - dy)
+    # Pillow >= 11 uses a named tuple for tile descriptors.
+    if hasattr(tile, "_replace"):
+        return tile._replace(extents=extents)
+    return (tile[0], extents, tile[2], tile[3])
+
+
+def _downscale_region(
+    img: Image.Image, box: tuple[int, int, int, int], size: tuple[int, int]
+) -> Image.Image:
+    """Shrink ``box`` of ``img`` to ``size`` without decoding at full scale.
+
+    JPEG sources are decoded at 1/2, 1/4 or 1/8 scale through ``draft`` and
+    every format gets an integer ``reduce`` pass before the final LANCZOS, in
+    both cases keeping ``_REDUCING_GAP`` of oversampling for the last step.
+    """
+
+    ratio = min((box[2] - box[0]) / size[0], (box[3] - box[1]) / size[1])
+    region: tuple[float, float, float, float] = box
+
+    if img.format == "JPEG" and ratio >= 2 * _REDUCING_GAP:
+        scale = next(s for s in (8, 4, 2) if s <= ratio / _REDUCING_GAP)
+        original_width = img.width
+        drafted = img.draft(img.mode, (img.width // scale, img.height // scale))
+        if drafted is not None:
+            factor = original_width / drafted[1][2]
+            region = tuple(value / factor for value in box)  # type: ignore[assignment]
+            ratio /= factor
+
+    if (
+        region[0] < 0
+        or region[1] < 0
+        or region[2] > img.width
+        or region[3] > img.height
+    ):
+        # Out-of-bounds crops are padded by crop(); reduce() needs an inner box.
+        img = img.crop(tuple(round(value) for value in region))
+        region = (0, 0, img.width, img.height)
+
+    factor = int(ratio / _REDUCING_GAP)
+    if factor > 1:
+        reduce_box = (
+            int(region[0]),
+            int(region[1]),
+            math.ceil(region[2]),
+            math.ceil(region[3]),
+        )
+        if img.mode in ("1", "P") or img.mode.startswith("I;16"):
+            # reduce() rejects these modes; resize() copes with them.
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        img = img.reduce(factor, box=reduce_box)
+        region = (
+            (region[0] - reduce_box[0]) / factor,
+            (region[1] - reduce_box[1]) / factor,
+            (region[2] - reduce_box[0]) / factor,
+            (region[3] - reduce_box[1]) / factor,
+        )
+
+    return img.resize(size, Image.Resampling.LANCZOS, box=region)
 
-    output_arr = np.zeros((output_height, output_width, 4), dtype=np.uint8)
-    mask_bool = mask_arr > 128
-    output_arr[mask_bool, :] = resized_arr[mask_bool, :]
-    mask_outside = mask_arr == 0
-    output_arr[mask_outside, :] = 0
-    return Image.fromarray(output_arr, mode="RGBA")
+
+def compare_downscale_quality(
+    image_path: Path | str,
+    crop_coords: CropConfig,
+    output_size_px: int,
+    corner_radius_ratio: float,
+) -> DownscaleQuality:
+    """Measure how far the fast downscale output drifts from the reference."""
+
+    reference = crop_image_to_rounded_rectangle(
+        image_path, crop_coords, output_size_px, corner_radius_ratio
+    )
+    fast = crop_image_to_rounded_rectangle(
+        image_path,
+        crop_coords,
+        output_size_px,
+        corner_radius_ratio,
+        fast_downscale=True,
+    )
+    diff = np.abs(
+        np.asarray(reference, dtype=np.int16) - np.asarray(fast, dtype=np.int16)
+    )
+    mse = float(np.mean(diff.astype(np.float64) ** 2))
+    psnr = math.inf if mse == 0 else 10 * math.log10(255**2 / mse)
+    return DownscaleQuality(
+        psnr=psnr,
+        mean_abs_diff=float(diff.mean()),
+        max_abs_diff=int(diff.max()),
+    )
 
 
 def process_images(
     image_files: Sequence[Path | str],
     crop_config_provider: Callable[[Path | str], CropConfig],
     settings: ImageProcessingSettings,
+    workers: int = 1,
+    cache: Optional[TileCache] = None,
 ) -> list[Image.Image]:
-    processed: list[Image.Image] = []
+    return [
+        tile.image
+        for tile in iter_processed_images(
+            image_files, crop_config_provider, settings, workers, cache
+        )
+    ]
+
+
+def iter_processed_images(
+    image_files: Sequence[Path | str],
+    crop_config_provider: Callable[[Path | str], CropConfig],
+    settings: ImageProcessingSettings,
+    workers: int = 1,
+    cache: Optional[TileCache] = None,
+) -> Iterator[ProcessedTile]:
+    """Crop, resize and mask images one at a time, preserving input order.
+
+    Tiles are yielded as soon as they are ready so callers can encode, place
+    and upload each one and drop it before the next is produced. When a
+    ``cache`` is given, tiles found there skip decoding entirely and newly
+    processed tiles are added to it.
+
+    With ``workers > 1`` the images are processed in a pool of worker
+    processes, with at most ``2 * workers`` tiles in flight. Crop configs are
+    still resolved in the calling process, so the provider does not need to
+    be picklable; cache lookups and stores run in the workers. Workers hand
+    tiles back through shared memory where available, so the yielded images
+    are read-only views of it.
+
+    In both modes an image that cannot be processed raises when its turn in
+    the output comes; images with an invalid crop are skipped.
+    """
+
     output_size_px = cm_to_pixels(settings.size_cm, settings.dpi)
+    if workers > 1 and len(image_files) > 1:
+        yield from _iter_processed_parallel(
+            image_files, crop_config_provider, settings, output_size_px, workers, cache
+        )
+        return
 
-    for index, image_file in enumerate(image_files, start=1):
+    for index, image_file in enumerate(image_files):
         crop = crop_config_provider(image_file)
         if crop.width <= 0 or crop.height <= 0:
             _LOGGER.warning("Skip %s: invalid crop", image_file)
             continue
-        image = crop_image_to_rounded_rectangle(
-            image_file,
-            crop,
-            output_size_px,
-            settings.corner_radius_ratio,
-        )
-        processed.append(image)
-        _LOGGER.info("Processed %s/%s", index, len(image_files))
 
-    return processed
+        key = cache.key_for(image_file, crop, output_size_px, settings) if cache else None
+        image = cache.get(key) if cache and key else None
+        if image is None:
+            image = _process_image(image_file, crop, output_size_px, settings)
+            if cache and key:
+                cache.put(key, image)
+        _LOGGER.info("Processed %s/%s", index + 1, len(image_files))
+        yield ProcessedTile(index=index, source=image_file, image=image)
+
+
+def _process_image(
+    image_file: Path | str,
+    crop: CropConfig,
+    output_size_px: int,
+    settings: ImageProcessingSettings,
+) -> Image.Image:
+    return crop_image_to_rounded_rectangle(
+        image_file,
+        crop,
+        output_size_px,
+        settings.corner_radius_ratio,
+        fast_downscale=settings.fast_downscale,
+        region_read=settings.region_read,
+    )
+
+
+def _process_image_shared(
+    image_file: Path | str,
+    crop: CropConfig,
+    output_size_px: int,
+    settings: ImageProcessingSettings,
+    cache: Optional[TileCache] = None,
+) -> TileTransport:
+    key = cache.key_for(image_file, crop, output_size_px, settings) if cache else None
+    image = cache.get(key) if cache and key else None
+    if image is None:
+        image = _process_image(image_file, crop, output_size_px, settings)
+        if cache and key:
+            cache.put(key, image)
+    return export_tile(image)
+
+
+# (source index, source path, result)
+_PendingTile = tuple[int, Path | str, Future[TileTransport]]
+
+
+def _iter_processed_parallel(
+    image_files: Sequence[Path | str],
+    crop_config_provider: Callable[[Path | str], CropConfig],
+    settings: ImageProcessingSettings,
+    output_size_px: int,
+    workers: int,
+    cache: Optional[TileCache],
+) -> Iterator[ProcessedTile]:
+    # Spawn instead of fork: the caller usually runs inside a thread of the
+    # web process, and forking a multi-threaded process is unsafe.
+    context = multiprocessing.get_context("spawn")
+    max_workers = min(workers, len(image_files))
+    pending: deque[_PendingTile] = deque()
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+    try:
+        for index, image_file in enumerate(image_files):
+            crop = crop_config_provider(image_file)
+            if crop.width <= 0 or crop.height <= 0:
+                _LOGGER.warning("Skip %s: invalid crop", image_file)
+                continue
+
+            future = executor.submit(
+                _process_image_shared, image_file, crop, output_size_px, settings, cache
+            )
+            pending.append((index, image_file, future))
+
+            if len(pending) >= 2 * max_workers:
+                yield from _collect_tile(pending.popleft(), len(image_files))
+
+        while pending:
+            yield from _collect_tile(pending.popleft(), len(image_files))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Tiles finished but never collected still hold shared memory.
+        for _, _, future in pending:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                discard_tile(future.result())
+
+
+def _collect_tile(entry: _PendingTile, total: int) -> Iterator[ProcessedTile]:
+    index, image_file, future = entry
+    image = import_tile(future.result())
+    _LOGGER.info("Processed %s/%s", index + 1, total)
+    yield ProcessedTile(index=index, source=image_file, image=image)
 
 
 def get_labels_for_image(filename: str, labels_config: dict[str, str]) -> dict[str, str]:
@@ -160,64 +475,79 @@ def get_labels_for_image(filename: str, labels_config: dict[str, str]) -> dict[s
 
 
 def create_ppt(
-    processed_images: Sequence[Image.Image],
-    original_filenames: Sequence[str],
+    processed_images: Iterable[Image.Image],
+    original_filenames: Iterable[str],
     settings: ImageProcessingSettings,
     columns: int,
     rows: int,
     column_spacing_cm: float,
     row_spacing_cm: float,
 ) -> Presentation:
-    prs = Presentation()
-    prs.slide_width = Cm(33.87)
-    prs.slide_height = Cm(19.05)
-
-    images_per_slide = columns * rows
-    img_size_cm = settings.size_cm
-    font_size = settings.label_config.get("font_size", 12)
-    font_size_pt = Pt(font_size)
-
-    label_color = settings.label_config.get("font_color", "#000000")
-    font_color_rgb = RGBColor(
-        int(label_color[1:3], 16),
-        int(label_color[3:5], 16),
-        int(label_color[5:7], 16),
-    )
+    deck = DeckBuilder(settings, columns, rows, column_spacing_cm, row_spacing_cm)
+    for img, filename in zip(processed_images, original_filenames):
+        deck.add_image(img, filename)
+    return deck.presentation
+
+
+class SlideGrid:
+    """Positions of the images and their labels on the slides of a deck."""
 
-    total_width = columns * img_size_cm + (columns - 1) * column_spacing_cm
-    total_height = rows * img_size_cm + (rows - 1) * row_spacing_cm
     slide_width_cm = 33.87
     slide_height_cm = 19.05
-    start_x_cm = (slide_width_cm - total_width) / 2
-    start_y_cm = (slide_height_cm - total_height) / 2
+    textbox_width_cm = 1.2
+    textbox_height_cm = 0.6
+    label_offset_cm = 0.1
+
+    def __init__(
+        self,
+        settings: ImageProcessingSettings,
+        columns: int,
+        rows: int,
+        column_spacing_cm: float,
+        row_spacing_cm: float,
+    ) -> None:
+        self.settings = settings
+        self.columns = columns
+        self.column_spacing_cm = column_spacing_cm
+        self.row_spacing_cm = row_spacing_cm
+        self.images_per_slide = columns * rows
+        self.count = 0
+
+        self.img_size_cm = settings.size_cm
+        font_size = settings.label_config.get("font_size", 12)
+        self.font_size_pt = Pt(font_size)
+
+        label_color = settings.label_config.get("font_color", "#000000")
+        self.font_color_rgb = RGBColor(
+            int(label_color[1:3], 16),
+            int(label_color[3:5], 16),
+            int(label_color[5:7], 16),
+        )
 
-    slide = None
-    for index, (img, filename) in enumerate(zip(processed_images, original_filenames)):
-        if index % images_per_slide == 0:
-            slide = prs.slides.add_slide(prs.slide_layouts[6])
+        total_width = columns * self.img_size_cm + (columns - 1) * column_spacing_cm
+        total_height = rows * self.img_size_cm + (rows - 1) * row_spacing_cm
+        self.start_x_cm = (self.slide_width_cm - total_width) / 2
+        self.start_y_cm = (self.slide_height_cm - total_height) / 2
 
-        position = index % images_per_slide
-        row = position // columns
-        col = position % columns
-        left_cm = start_x_cm + col * (img_size_cm + column_spacing_cm)
-        top_cm = start_y_cm + row * (img_size_cm + row_spacing_cm)
+    def cell(self, index: int) -> tuple[float, float]:
+        """Top-left corner, in cm, of the ``index``-th image of the deck."""
 
-        image_stream = io.BytesIO()
-        img.save(image_stream, format="PNG")
-        image_stream.seek(0)
+        position = index % self.images_per_slide
+        row = position // self.columns
+        col = position % self.columns
+        left_cm = self.start_x_cm + col * (self.img_size_cm + self.column_spacing_cm)
+        top_cm = self.start_y_cm + row * (self.img_size_cm + self.row_spacing_cm)
+        return left_cm, top_cm
 
-        slide.shapes.add_picture(
-            image_stream,
-            Cm(left_cm),
-            Cm(top_cm),
-            width=Cm(img_size_cm),
-            height=Cm(img_size_cm),
-        )
+    def label_boxes(
+        self, left_cm: float, top_cm: float, filename: str
+    ) -> list[tuple[str, float, float, PP_ALIGN]]:
+        """Text, position and alignment of the labels of one image."""
 
-        labels = get_labels_for_image(filename, settings.label_config)
-        textbox_height_cm = 0.6
-        textbox_width_cm = 1.2
-        offset_cm = 0.1
+        labels = get_labels_for_image(filename, self.settings.label_config)
+        img_size_cm = self.img_size_cm
+        offset_cm = self.label_offset_cm
+        boxes = []
 
         for position_key, label_key in [
             ("top_left", "top_left"),
@@ -232,35 +562,110 @@ def create_ppt(
             if "top" in position_key:
                 y_pos = top_cm + offset_cm
             else:
-                y_pos = top_cm + img_size_cm - textbox_height_cm - offset_cm
+                y_pos = top_cm + img_size_cm - self.textbox_height_cm - offset_cm
 
             if "left" in position_key:
                 x_pos = left_cm + offset_cm
                 align = PP_ALIGN.LEFT
             else:
-                x_pos = left_cm + img_size_cm - textbox_width_cm - offset_cm
+                x_pos = left_cm + img_size_cm - self.textbox_width_cm - offset_cm
                 align = PP_ALIGN.RIGHT
 
-            textbox = slide.shapes.add_textbox(
-                Cm(x_pos),
-                Cm(y_pos),
-                Cm(textbox_width_cm),
-                Cm(textbox_height_cm),
+            boxes.append((label_text, x_pos, y_pos, align))
+        return boxes
+
+
+class DeckBuilder(SlideGrid):
+    """Lay out images on slides one at a time.
+
+    Unlike ``create_ppt`` the caller keeps no reference to the images, so each
+    tile can be released right after it has been placed.
+    """
+
+    def __init__(
+        self,
+        settings: ImageProcessingSettings,
+        columns: int,
+        rows: int,
+        column_spacing_cm: float,
+        row_spacing_cm: float,
+    ) -> None:
+        super().__init__(settings, columns, rows, column_spacing_cm, row_spacing_cm)
+        self.presentation = Presentation()
+        self.presentation.slide_width = Cm(self.slide_width_cm)
+        self.presentation.slide_height = Cm(self.slide_height_cm)
+        self._slide = None
+        self._label_templates: dict[tuple[float, float, PP_ALIGN], Any] = {}
+
+    def add_image(self, img: Image.Image, filename: str) -> None:
+        image_stream = io.BytesIO()
+        img.save(image_stream, format="PNG")
+        image_stream.seek(0)
+        self.add_picture(image_stream, filename)
+
+    def add_picture(self, image_stream: IO[bytes], filename: str) -> None:
+        """Place an already encoded image, e.g. bytes shared with an upload."""
+
+        index = self.count
+        self.count += 1
+        if index % self.images_per_slide == 0:
+            self._slide = self.presentation.slides.add_slide(
+                self.presentation.slide_layouts[6]
             )
-            text_frame = textbox.text_frame
-            text_frame.text = label_text
-            paragraph = text_frame.paragraphs[0]
-            paragraph.font.size = font_size_pt
-            paragraph.font.bold = True
-            paragraph.font.color.rgb = font_color_rgb
-            paragraph.alignment = align
+        slide = self._slide
+
+        img_size_cm = self.img_size_cm
+        left_cm, top_cm = self.cell(index)
+        slide.shapes.add_picture(
+            image_stream,
+            Cm(left_cm),
+            Cm(top_cm),
+            width=Cm(img_size_cm),
+            height=Cm(img_size_cm),
+        )
+
+        # Styling a textbox through the shape API is slow, so each label box
+        # is built once and later labels are copies with new id and text.
+        for label_text, x_pos, y_pos, align in self.label_boxes(left_cm, top_cm, filename):
+            key = (x_pos, y_pos, align)
+            template = self._label_templates.get(key)
+            single_line = "\n" not in label_text and "\v" not in label_text
+            if template is None or not single_line:
+                textbox = self._add_label(slide, label_text, x_pos, y_pos, align)
+                if single_line:
+                    self._label_templates[key] = textbox._element
+                continue
+
+            element = copy.deepcopy(template)
+            shape_id = slide.shapes._next_shape_id
+            element.nvSpPr.cNvPr.id = shape_id
+            element.nvSpPr.cNvPr.name = f"TextBox {shape_id - 1}"
+            element.txBody.p_lst[0].r_lst[0].text = label_text
+            slide.shapes._spTree.append(element)
+
+    def _add_label(self, slide, label_text: str, x_pos: float, y_pos: float, align: PP_ALIGN):
+        textbox = slide.shapes.add_textbox(
+            Cm(x_pos),
+            Cm(y_pos),
+            Cm(self.textbox_width_cm),
+            Cm(self.textbox_height_cm),
+        )
+        text_frame = textbox.text_frame
+        text_frame.text = label_text
+        paragraph = text_frame.paragraphs[0]
+        paragraph.font.size = self.font_size_pt
+        paragraph.font.bold = True
+        paragraph.font.color.rgb = self.font_color_rgb
+        paragraph.alignment = align
 
-            textbox.fill.solid()
-            textbox.fill.fore_color.rgb = RGBColor(255, 255, 255)
-            textbox.fill.transparency = 1.0
-            textbox.line.fill.background()
+        textbox.fill.solid()
+        textbox.fill.fore_color.rgb = RGBColor(255, 255, 255)
+        textbox.fill.transparency = 1.0
+        textbox.line.fill.background()
+        return textbox
 
-    return prs
+    def save(self, path: Path) -> None:
+        self.presentation.save(path)
 
 
 def load_config(config_path: Path) -> dict:
@@ -269,8 +674,4 @@ def load_config(config_path: Path) -> dict:
 
 
 def list_images(directory: Path, extensions: Iterable[str] | None = None) -> list[Path]:
-    extensions = extensions or [".jpg", ".jpeg", ".tif", ".tiff", ".png"]
-    files: list[Path] = []
-    for ext in extensions:
-        files.extend(sorted(directory.glob(f"*{ext}")))
-    return files
+    return [Path(file) for file in list_image_files(directory, extensions)]
@@ -0,0 +1,226 @@
+"""Live progress events of processing tasks.
+
+Tasks publish an event when they change stage and, throttled, as images are
+done; the API streams them to clients over Server-Sent Events. The memory
+broker only reaches subscribers in the same process, so with
+``TASK_QUEUE_MODE=worker`` set ``PROGRESS_BROKER=redis``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Protocol, Sequence
+
+import redis.asyncio as aioredis
+
+from app.core.config import get_settings
+from app.models import ProcessingTask, TaskStatus
+
+_LOGGER = logging.getLogger(__name__)
+
+# Events are snapshots, so a slow subscriber only needs the latest ones.
+_SUBSCRIBER_BUFFER = 64
+# Image progress is published at most this often; stage changes always are.
+_MIN_INTERVAL_SECONDS = 0.5
+
+_FINISHED = {TaskStatus.COMPLETED.value, TaskStatus.FAILED.value, TaskStatus.CANCELLED.value}
+
+
+@dataclass(slots=True)
+class ProgressEvent:
+    task_id: int
+    tenant_id: int
+    status: str
+    stage: str
+    done: int = 0
+    total: int = 0
+    eta_seconds: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    @classmethod
+    def from_task(cls, task: ProcessingTask, stage: Optional[str] = None) -> "ProgressEvent":
+        return cls(
+            task_id=task.id,
+            tenant_id=task.tenant_id,
+            status=task.status.value,
+            stage=stage or task.status.value,
+            done=task.image_count or 0,
+            total=task.image_count or 0,
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "ProgressEvent":
+        return cls(**json.loads(data))
+
+    def to_sse(self) -> str:
+        return f"event: progress\ndata: {self.to_json()}\n\n"
+
+
+class Subscription(Protocol):
+    async def get(self) -> ProgressEvent: ...
+
+
+class ProgressBroker(Protocol):
+    async def publish(self, event: ProgressEvent) -> None: ...
+
+    async def publish_many(self, events: Sequence[ProgressEvent]) -> None: ...
+
+    def subscribe(self, tenant_id: int) -> contextlib.AbstractAsyncContextManager[Subscription]: ...
+
+
+class MemoryBroker:
+    """Fan events out to subscribers of the same process."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[int, set[asyncio.Queue[ProgressEvent]]] = defaultdict(set)
+
+    async def publish(self, event: ProgressEvent) -> None:
+        for queue in list(self._subscribers.get(event.tenant_id, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish_many(self, events: Sequence[ProgressEvent]) -> None:
+        for event in events:
+            await self.publish(event)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, tenant_id: int) -> AsyncIterator[asyncio.Queue[ProgressEvent]]:
+        queue: asyncio.Queue[ProgressEvent] = asyncio.Queue(maxsize=_SUBSCRIBER_BUFFER)
+        self._subscribers[tenant_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers[tenant_id]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[tenant_id]
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub: aioredis.client.PubSub) -> None:
+        self._pubsub = pubsub
+
+    async def get(self) -> ProgressEvent:
+        while True:
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            if message is not None:
+                return ProgressEvent.from_json(message["data"])
+
+
+class RedisBroker:
+    """Relay events between processes through Redis pub/sub, per tenant."""
+
+    def __init__(self, url: str) -> None:
+        self._client = aioredis.from_url(url)
+
+    async def publish(self, event: ProgressEvent) -> None:
+        await self._client.publish(_channel(event.tenant_id), event.to_json())
+
+    async def publish_many(self, events: Sequence[ProgressEvent]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.publish(_channel(event.tenant_id), event.to_json())
+            await pipe.execute()
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, tenant_id: int) -> AsyncIterator[_RedisSubscription]:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(_channel(tenant_id))
+        try:
+            yield _RedisSubscription(pubsub)
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+
+def _channel(tenant_id: int) -> str:
+    return f"task-progress:{tenant_id}"
+
+
+@lru_cache
+def get_progress_broker() -> ProgressBroker:
+    settings = get_settings()
+    if settings.progress_broker == "redis":
+        return RedisBroker(settings.redis_url)
+    return MemoryBroker()
+
+
+async def publish_progress(event: ProgressEvent) -> None:
+    """Publish ``event``; progress is best effort and never fails a task."""
+
+    try:
+        await get_progress_broker().publish(event)
+    except Exception:
+        _LOGGER.warning("Publishing progress of task %s failed", event.task_id, exc_info=True)
+
+
+async def publish_progress_many(events: Sequence[ProgressEvent]) -> None:
+    """Publish ``events`` in one round-trip, best effort like ``publish_progress``."""
+
+    try:
+        await get_progress_broker().publish_many(events)
+    except Exception:
+        _LOGGER.warning("Publishing progress of %s tasks failed", len(events), exc_info=True)
+
+
+class ProgressReporter:
+    """Publish the progress of one task run, with an ETA for the images."""
+
+    def __init__(self, task: ProcessingTask) -> None:
+        self._task = task
+        self._stage = "queued"
+        self._done = 0
+        self._total = 0
+        self._started: Optional[float] = None
+        self._published = 0.0
+
+    async def stage(self, stage: str, total: Optional[int] = None) -> None:
+        self._stage = stage
+        # Only the stage that declares a total gets an ETA.
+        self._started = time.monotonic() if total is not None else None
+        if total is not None:
+            self._total = total
+        await self._publish()
+
+    async def advance(self, done: int) -> None:
+        self._done = done
+        if time.monotonic() - self._published >= _MIN_INTERVAL_SECONDS:
+            await self._publish()
+
+    async def finish(self) -> None:
+        self._stage = self._task.status.value
+        await self._publish()
+
+    def _eta(self) -> Optional[float]:
+        if self._started is None or not self._done or self._done >= self._total:
+            return None
+        elapsed = time.monotonic() - self._started
+        return round(elapsed / self._done * (self._total - self._done), 1)
+
+    async def _publish(self) -> None:
+        self._published = time.monotonic()
+        await publish_progress(
+            ProgressEvent(
+                task_id=self._task.id,
+                tenant_id=self._task.tenant_id,
+                status=self._task.status.value,
+                stage=self._stage,
+                done=self._done,
+                total=self._total,
+                eta_seconds=self._eta(),
+            )
+        )
@@ -0,0 +1,355 @@
+"""Durable task queue backed by the ``processing_tasks`` table.
+
+Pending tasks are the queue. A worker claims one by moving it to
+``PROCESSING`` with a lease, and renews the lease while it works. A task
+whose lease runs out, because its worker died or hung, can be claimed again,
+so every task runs at least once; after ``task_max_attempts`` claims it is
+failed instead.
+
+Claims are fair across tenants: at most ``max_concurrent_tasks`` tasks hold
+a lease at once and at most ``max_tasks_per_tenant`` per tenant, and the
+next task comes from the tenant with the fewest running tasks per unit of
+``Tenant.task_weight``, oldest task first. A tenant queueing thousands of
+tasks therefore only delays others by its share of the slots.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, Optional
+
+from sqlalchemy import Float, and_, case, cast, func, or_, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.models import ProcessingTask, TaskStatus, Tenant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Another worker may take the candidate between the SELECT and the UPDATE on
+# databases without row locks; give up after this many lost races.
+_CLAIM_RETRIES = 5
+
+
+@dataclass(slots=True)
+class Lease:
+    """Lease of ``worker_id`` on a task; ``lost`` once another worker took it."""
+
+    task_id: int
+    worker_id: str
+    lost: bool = False
+
+
+def worker_identity() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _abandoned(now: datetime):
+    # Rows left PROCESSING without a lease predate the queue.
+    return and_(
+        ProcessingTask.status == TaskStatus.PROCESSING,
+        or_(ProcessingTask.lease_expires_at.is_(None), ProcessingTask.lease_expires_at < now),
+    )
+
+
+def _claimable(now: datetime):
+    return or_(ProcessingTask.status == TaskStatus.PENDING, _abandoned(now))
+
+
+async def claim_next_task(session: AsyncSession, worker_id: str) -> Optional[int]:
+    """Lease the next task in fair order to ``worker_id`` and return its id.
+
+    Returns None when nothing is waiting or the concurrency limits are
+    reached. The limits are checked before claiming, so workers claiming at
+    the same moment may briefly exceed them by one task each.
+
+    The candidate is selected with ``FOR UPDATE SKIP LOCKED`` where the
+    database supports it, and claimed with an UPDATE that re-checks it is
+    still claimable, so two workers never hold the same lease.
+    """
+
+    settings = get_settings()
+    now = datetime.utcnow()
+    await _fail_exhausted(session, now)
+    for _ in range(_CLAIM_RETRIES):
+        running = await _running_per_tenant(session, now)
+        tenant_id = None
+        if sum(running.values()) < settings.max_concurrent_tasks:
+            tenant_id = await _next_tenant(session, now, running, settings.max_tasks_per_tenant)
+        if tenant_id is None:
+            await session.commit()
+            return None
+
+        result = await session.exec(
+            select(ProcessingTask.id)
+            .where(_claimable(now), ProcessingTask.tenant_id == tenant_id)
+            .order_by(ProcessingTask.created_at, ProcessingTask.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        task_id = result.first()
+        if task_id is not None and await claim_task(session, task_id, worker_id, now=now):
+            return task_id
+    return None
+
+
+async def queue_positions(session: AsyncSession, task_ids: Iterable[int]) -> dict[int, int]:
+    """Position in dispatch order, starting at 1, of those ``task_ids`` still waiting.
+
+    Ranks the waiting tasks in the fair order of ``claim_next_task`` in one
+    query, assuming running tasks keep their slots; the per-tenant limit only
+    delays a tenant, so it is not simulated. A tenant's n-th waiting task is
+    due once it has ``running + n - 1`` tasks per unit of weight, and ties go
+    to the oldest task.
+    """
+
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+
+    now = datetime.utcnow()
+    running = (
+        select(ProcessingTask.tenant_id, func.count().label("running"))
+        .where(
+            ProcessingTask.status == TaskStatus.PROCESSING,
+            ProcessingTask.lease_expires_at >= now,
+        )
+        .group_by(ProcessingTask.tenant_id)
+        .subquery()
+    )
+    waiting = (
+        select(
+            ProcessingTask.id,
+            ProcessingTask.tenant_id,
+            ProcessingTask.created_at,
+            func.row_number()
+            .over(
+                partition_by=ProcessingTask.tenant_id,
+                order_by=(ProcessingTask.created_at, ProcessingTask.id),
+            )
+            .label("rank"),
+        )
+        .where(_claimable(now))
+        .subquery()
+    )
+    weight = case((Tenant.task_weight >= 1, Tenant.task_weight), else_=1)
+    load = cast(func.coalesce(running.c.running, 0) + waiting.c.rank - 1, Float) / weight
+    ordered = (
+        select(
+            waiting.c.id,
+            func.row_number()
+            .over(order_by=(load, waiting.c.created_at, waiting.c.id))
+            .label("position"),
+        )
+        .select_from(
+            waiting.outerjoin(running, running.c.tenant_id == waiting.c.tenant_id).outerjoin(
+                Tenant, Tenant.id == waiting.c.tenant_id
+            )
+        )
+        .subquery()
+    )
+    result = await session.exec(
+        select(ordered.c.id, ordered.c.position).where(ordered.c.id.in_(task_ids))
+    )
+    return dict(result.all())
+
+
+async def claim_task(
+    session: AsyncSession, task_id: int, worker_id: str, now: Optional[datetime] = None
+) -> bool:
+    """Lease the task ``task_id`` to ``worker_id`` if it is claimable."""
+
+    now = now or datetime.utcnow()
+    result = await session.exec(
+        update(ProcessingTask)
+        .where(ProcessingTask.id == task_id, _claimable(now))
+        .values(
+            status=TaskStatus.PROCESSING,
+            worker_id=worker_id,
+            lease_expires_at=now + _lease_duration(),
+            attempts=ProcessingTask.attempts + 1,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def extend_lease(session: AsyncSession, task_id: int, worker_id: str) -> bool:
+    """Renew the lease of ``worker_id``; False once another worker took over."""
+
+    result = await session.exec(
+        update(ProcessingTask)
+        .where(
+            ProcessingTask.id == task_id,
+            ProcessingTask.worker_id == worker_id,
+            ProcessingTask.status == TaskStatus.PROCESSING,
+        )
+        .values(lease_expires_at=datetime.utcnow() + _lease_duration())
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def release_task(session: AsyncSession, task_id: int, worker_id: str) -> None:
+    """Drop the lease of ``worker_id`` on a task it stopped running.
+
+    A task interrupted before it ended, e.g. by a shutdown, is left with an
+    expired lease so the next worker claims it right away and resumes it from
+    its checkpoints.
+    """
+
+    await session.exec(
+        update(ProcessingTask)
+        .where(ProcessingTask.id == task_id, ProcessingTask.worker_id == worker_id)
+        .values(
+            lease_expires_at=case(
+                (ProcessingTask.status == TaskStatus.PROCESSING, datetime.utcnow()),
+                else_=None,
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+@contextlib.asynccontextmanager
+async def hold_lease(
+    task_id: int, worker_id: str, session_factory: Optional[async_sessionmaker] = None
+) -> AsyncIterator[Lease]:
+    """Renew the lease on ``task_id`` in the background until the block exits.
+
+    The heartbeat uses its own sessions, so it keeps running while the task
+    holds a long transaction or blocks in a thread. When a renewal fails the
+    yielded lease is marked lost; the run has to stop, see
+    app.services.cancellation.
+    """
+
+    if session_factory is None:
+        from app.db.session import async_session as session_factory
+
+    lease = Lease(task_id, worker_id)
+
+    async def heartbeat() -> None:
+        interval = get_settings().task_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    if not await extend_lease(session, task_id, worker_id):
+                        _LOGGER.warning("Lost the lease on task %s", task_id)
+                        lease.lost = True
+                        return
+            except Exception:
+                _LOGGER.exception("Renewing the lease on task %s failed", task_id)
+
+    renewer = asyncio.create_task(heartbeat())
+    try:
+        yield lease
+    finally:
+        renewer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await renewer
+        async with session_factory() as session:
+            await release_task(session, task_id, worker_id)
+
+
+async def cancel_task(session: AsyncSession, task_id: int) -> bool:
+    """Mark a waiting or running task cancelled; False if it already ended.
+
+    A running task notices between images and stops on its own, see
+    app.services.cancellation.
+    """
+
+    result = await session.exec(
+        update(ProcessingTask)
+        .where(
+            ProcessingTask.id == task_id,
+            ProcessingTask.status.in_([TaskStatus.PENDING, TaskStatus.PROCESSING]),
+        )
+        .values(
+            status=TaskStatus.CANCELLED,
+            error_message="Cancelled",
+            updated_at=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def _fail_exhausted(session: AsyncSession, now: datetime) -> None:
+    max_attempts = get_settings().task_max_attempts
+    result = await session.exec(
+        update(ProcessingTask)
+        .where(_abandoned(now), ProcessingTask.attempts >= max_attempts)
+        .values(
+            status=TaskStatus.FAILED,
+            error_message=f"Worker lease expired {max_attempts} times",
+            lease_expires_at=None,
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        _LOGGER.warning("Failed %s tasks whose workers kept dying", result.rowcount)
+    await session.commit()
+
+
+async def _running_per_tenant(session: AsyncSession, now: datetime) -> dict[int, int]:
+    result = await session.exec(
+        select(ProcessingTask.tenant_id, func.count())
+        .where(
+            ProcessingTask.status == TaskStatus.PROCESSING,
+            ProcessingTask.lease_expires_at >= now,
+        )
+        .group_by(ProcessingTask.tenant_id)
+    )
+    return dict(result.all())
+
+
+async def _weights(session: AsyncSession, tenant_ids: list[int]) -> dict[int, int]:
+    weights = dict.fromkeys(tenant_ids, 1)
+    if tenant_ids:
+        result = await session.exec(
+            select(Tenant.id, Tenant.task_weight).where(Tenant.id.in_(tenant_ids))
+        )
+        for tenant_id, weight in result.all():
+            weights[tenant_id] = max(weight or 1, 1)
+    return weights
+
+
+async def _next_tenant(
+    session: AsyncSession, now: datetime, running: dict[int, int], per_tenant: int
+) -> Optional[int]:
+    result = await session.exec(
+        select(ProcessingTask.tenant_id, func.min(ProcessingTask.created_at))
+        .where(_claimable(now))
+        .group_by(ProcessingTask.tenant_id)
+    )
+    oldest = {
+        tenant_id: created_at
+        for tenant_id, created_at in result.all()
+        if running.get(tenant_id, 0) < per_tenant
+    }
+    if not oldest:
+        return None
+    weights = await _weights(session, list(oldest))
+    return min(
+        oldest,
+        key=lambda tenant_id: (running.get(tenant_id, 0) / weights[tenant_id], oldest[tenant_id]),
+    )
+
+
+def _lease_duration() -> timedelta:
+    return timedelta(seconds=get_settings().task_lease_seconds)
@@ -0,0 +1,35 @@
+"""Wall-clock timing of the stages of a processing task."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StageTimer:
+    """Accumulate seconds per named stage.
+
+    A stage may be entered many times, e.g. once per image; its time adds
+    up. ``total`` is the time since the timer was created.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def as_dict(self) -> dict[str, float]:
+        timings = {name: round(value, 4) for name, value in self.seconds.items()}
+        timings["total"] = round(time.perf_counter() - self._started, 4)
+        return timings
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import io
+import json
 import logging
+import os
+from collections import deque
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Optional, Sequence
 
+from PIL import Image
+from sqlalchemy import delete
+from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import get_settings
-from app.models import ImageAsset, ProcessingTask, TaskStatus
+from app.core.metrics import IMAGES_PROCESSED, TASK_DURATION, instrument_storage
+from app.models import ImageAsset, ProcessingTask, TaskCheckpoint, TaskStatus
+from app.services.cancellation import CancellationCheck, LeaseLost, TaskCancelled
 from app.services.config_loader import LegacyConfig, load_legacy_config, to_processing_settings
-from app.services.processor import CropConfig, ImageProcessingSettings, create_ppt, process_images
+from app.services.deck_parts import DeckPart, DeckPartBuilder
+from app.services.deck_writer import StreamingDeckWriter
+from app.services.encoding import PROFILES, EncodedImage, EncodedTile, encode_image, encode_tiles
+from app.services.file_index import list_image_files
+from app.services.processor import iter_processed_images
+from app.services.progress import ProgressEvent, ProgressReporter, publish_progress
+from app.services.queue import Lease, hold_lease
+from app.services.stage_timer import StageTimer
 from app.services.storage import get_storage_backend
+from app.services.tile_cache import get_tile_cache
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def execute_processing_task(session: AsyncSession, task: ProcessingTask) -> None:
-    storage = get_storage_backend()
+async def execute_processing_task(
+    session: AsyncSession, task: ProcessingTask, lease: Optional[Lease] = None
+) -> None:
+    storage = instrument_storage(get_storage_backend())
     app_settings = get_settings()
 
     asset = await session.get(ImageAsset, task.image_asset_id)
@@ -25,59 +45,263 @@ async def execute_processing_task(session: AsyncSession, task: ProcessingTask) -
         task.status = TaskStatus.FAILED
         task.error_message = "Image asset not found"
         await session.commit()
+        await publish_progress(ProgressEvent.from_task(task))
         return
 
+    if task.status == TaskStatus.CANCELLED:
+        return
     task.status = TaskStatus.PROCESSING
     await session.commit()
 
+    timer = StageTimer()
+    progress = ProgressReporter(task)
+    cancellation = CancellationCheck(
+        task.id, task.time_budget_seconds or app_settings.task_time_budget_seconds, lease=lease
+    )
+    saved = 0
     try:
-        config = _load_config(task)
-        processing_settings = to_processing_settings(config)
-        crop_config = config.uniform_crop()
-        layout = config.ppt_layout()
-
-        local_root = Path(app_settings.storage_local_root)
-        if not local_root.is_absolute():
-            backend_app_root = Path(__file__).resolve().parents[2]
-            local_root = (backend_app_root / local_root).resolve()
-
-        original_files = _resolve_original_files(asset.original_path, str(local_root))
-        processed_images = await asyncio.to_thread(
-            process_images,
-            original_files,
-            lambda path: crop_config,
+        await progress.stage("config")
+        with timer.stage("config"):
+            config = _load_config(task)
+            processing_settings = to_processing_settings(config)
+            crop_provider = config.crop_provider()
+            layout = config.ppt_layout()
+            encoding_profile = config.encoding_profile()
+
+        with timer.stage("resolve"):
+            original_files = resolve_original_files(
+                asset.original_path, str(local_storage_root())
+            )
+            task.bytes_processed = sum(os.path.getsize(file) for file in original_files)
+
+            output_dir = Path(task.output_dir or "processed")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            # The output directory may be shared, so a task's tiles, which its
+            # checkpoints point at, get a directory of their own.
+            tiles_dir = output_dir / f"task_{task.id}"
+            tiles_dir.mkdir(exist_ok=True)
+            # Tiles finished by an earlier, interrupted run are not redone.
+            restored = await _load_checkpoints(session, task, original_files, output_dir)
+            done = {checkpoint.tile_index for checkpoint in restored}
+            pending = [index for index in range(len(original_files)) if index not in done]
+        if restored:
+            _LOGGER.info("Task %s resumes with %s tiles done", task.id, len(restored))
+        await cancellation.check()
+        await progress.stage("process", total=len(original_files))
+
+        # Tasks share the output directory and the tenant's storage prefix.
+        deck_stem = f"task{task.id}"
+        # Pictures go straight into a deck spooled next to the outputs, so the
+        # deck never holds more than the slide being filled. Large batches
+        # can instead be split into parts built by worker processes.
+        deck: StreamingDeckWriter | None = None
+        parts: DeckPartBuilder | None = None
+        if layout["slides_per_part"] > 0:
+            parts = DeckPartBuilder(
+                output_dir,
+                processing_settings,
+                layout,
+                layout["slides_per_part"],
+                app_settings.deck_workers,
+                stem=deck_stem,
+            )
+        else:
+            deck = StreamingDeckWriter(
+                processing_settings,
+                layout["columns"],
+                layout["rows"],
+                layout["column_spacing_cm"],
+                layout["row_spacing_cm"],
+                spool_dir=output_dir,
+            )
+        tiles = iter_processed_images(
+            [original_files[index] for index in pending],
+            crop_provider,
             processing_settings,
+            app_settings.processing_workers,
+            get_tile_cache(),
         )
 
-        ppt = await asyncio.to_thread(
-            create_ppt,
-            processed_images,
-            [Path(f).name for f in original_files],
-            processing_settings,
-            layout["columns"],
-            layout["rows"],
-            layout["column_spacing_cm"],
-            layout["row_spacing_cm"],
+        encoded_tiles = encode_tiles(tiles, encoding_profile, app_settings.encoding_workers)
+
+        # Tiles are encoded on a bounded thread pool while later images are
+        # still being processed. Each one is placed, saved and uploaded as it
+        # comes out, so memory stays flat whatever the batch size. Restored
+        # tiles are placed from their saved files, in input order with the
+        # new ones. Every uploaded tile is checkpointed.
+        # "process" is the time spent waiting for the next encoded tile;
+        # "encode_cpu" sums the encoder threads' time, which overlaps it.
+        image_urls: dict[str, str] = {}
+        encode_seconds = 0.0
+        encoded_bytes = 0
+        try:
+            while True:
+                await cancellation.check()
+                with timer.stage("process"):
+                    item = await _next_in_thread(encoded_tiles)
+                tile_index = pending[item.index] if item is not None else len(original_files)
+                while restored and restored[0].tile_index < tile_index:
+                    checkpoint = restored.popleft()
+                    saved += 1
+                    with timer.stage("save"):
+                        await asyncio.to_thread(
+                            _restore_tile, checkpoint, deck, parts, output_dir / checkpoint.file_name
+                        )
+                    image_urls.setdefault("primary", checkpoint.url)
+                if item is None:
+                    break
+                saved += 1
+                IMAGES_PROCESSED.inc()
+                # Named by position in the input, like the checkpoint, so a
+                # resumed run never reuses the name of a restored tile.
+                filename = tiles_dir / f"processed_{tile_index + 1:03}{encoding_profile.extension}"
+                tile_name = filename.relative_to(output_dir).as_posix()
+                with timer.stage("save"):
+                    await asyncio.to_thread(_save_tile, item, deck, parts, filename)
+
+                encode_seconds += item.encoded.encode_seconds
+                encoded_bytes += item.encoded.size
+                with timer.stage("upload"):
+                    stored = await _upload_image(storage, asset, tile_name, item.encoded)
+                # A run that lost its lease may have saved this tile meanwhile.
+                await session.exec(
+                    delete(TaskCheckpoint).where(
+                        TaskCheckpoint.task_id == task.id,
+                        TaskCheckpoint.tile_index == tile_index,
+                    )
+                )
+                session.add(
+                    TaskCheckpoint(
+                        task_id=task.id,
+                        tile_index=tile_index,
+                        source=str(item.source),
+                        file_name=tile_name,
+                        storage_key=stored.key,
+                        url=stored.url,
+                    )
+                )
+                await session.commit()
+                del item
+                image_urls.setdefault("primary", stored.url)
+                await progress.advance(saved)
+
+                if parts is not None:
+                    for part in parts.completed():
+                        with timer.stage("upload"):
+                            await _publish_part(session, storage, asset, task, parts, part)
+        except BaseException:
+            if deck is not None:
+                deck.discard()
+            if parts is not None:
+                await asyncio.to_thread(parts.discard)
+            raise
+        finally:
+            # Closing waits for the images still in the pools; keep the event
+            # loop, and with it heartbeats and other tasks, running meanwhile.
+            await asyncio.to_thread(encoded_tiles.close)
+            await asyncio.to_thread(tiles.close)
+
+        timer.add("encode_cpu", encode_seconds)
+        _LOGGER.info(
+            "Task %s encoded %s tiles as %s in %.2fs, %s bytes",
+            task.id,
+            saved,
+            encoding_profile.name,
+            encode_seconds,
+            encoded_bytes,
         )
 
-        output_dir = Path(task.output_dir or "processed")
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        result_files = await _save_processed_images(processed_images, output_dir)
-        ppt_path = output_dir / "output.pptx"
-        await asyncio.to_thread(ppt.save, ppt_path)
-
-        uploaded_paths = await _upload_results(storage, asset, result_files, ppt_path)
-
-        asset.processed_path = uploaded_paths["images"].get("primary")
-        task.result_path = uploaded_paths["ppt"]
+        await progress.stage("deck")
+        if parts is not None:
+            try:
+                remaining = parts.finish()
+                while True:
+                    with timer.stage("deck"):
+                        part = await _next_in_thread(remaining)
+                    if part is None:
+                        break
+                    with timer.stage("upload"):
+                        await _publish_part(session, storage, asset, task, parts, part)
+                    await cancellation.check()
+            except BaseException:
+                await asyncio.to_thread(parts.discard)
+                raise
+            finally:
+                await asyncio.to_thread(parts.close)
+            with timer.stage("upload"):
+                result_url = await _upload_manifest(storage, asset, parts, complete=True)
+        else:
+            ppt_path = output_dir / f"{deck_stem}.pptx"
+            with timer.stage("deck"):
+                await asyncio.to_thread(deck.save, ppt_path)
+            with timer.stage("upload"):
+                result_url = await _upload_ppt(storage, asset, ppt_path)
+
+        await cancellation.check()
+        asset.processed_path = image_urls.get("primary")
+        task.result_path = result_url
         task.status = TaskStatus.COMPLETED
+        _record_timings(task, timer, saved)
+        await session.commit()
+        await progress.finish()
+    except LeaseLost as exc:
+        _LOGGER.warning("Task %s stopped, its lease was lost: %s", task.id, exc)
+        await session.rollback()
+    except TaskCancelled as exc:
+        _LOGGER.info("Task %s stopped: %s", task.id, exc)
+        task.status = exc.status
+        task.error_message = str(exc)
+        _record_timings(task, timer, saved)
         await session.commit()
+        await progress.finish()
     except Exception as exc:  # pragma: no cover
+        if await cancellation.lease_lost():
+            _LOGGER.warning("Task %s failed after its lease was lost", task.id, exc_info=True)
+            await session.rollback()
+            return
         _LOGGER.exception("Task %s failed", task.id)
         task.status = TaskStatus.FAILED
         task.error_message = str(exc)
+        _record_timings(task, timer, saved)
         await session.commit()
+        await progress.finish()
+
+
+async def run_claimed_task(task_id: int, worker_id: str) -> None:
+    """Execute a task leased to ``worker_id``, renewing the lease meanwhile."""
+
+    from app.db.session import async_session
+
+    async with hold_lease(task_id, worker_id) as lease:
+        async with async_session() as session:  # type: ignore[call-arg]
+            task = await session.get(ProcessingTask, task_id)
+            if task is None:
+                return
+            await execute_processing_task(session, task, lease)
+
+
+async def _next_in_thread(iterator):
+    """``next(iterator, None)`` on a thread.
+
+    When the caller is cancelled the call still runs to completion, so the
+    generator is not executing anymore when it is closed.
+    """
+
+    future = asyncio.ensure_future(asyncio.to_thread(next, iterator, None))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        with contextlib.suppress(BaseException):
+            await future
+        raise
+
+
+def _record_timings(task: ProcessingTask, timer: StageTimer, image_count: int) -> None:
+    timings = timer.as_dict()
+    task.timings_json = json.dumps(timings)
+    task.image_count = image_count
+    TASK_DURATION.labels(task.status.value).observe(timings["total"])
+    _LOGGER.info("Task %s stage timings: %s", task.id, task.timings_json)
 
 
 def _load_config(task: ProcessingTask) -> LegacyConfig:
@@ -105,7 +329,15 @@ def _load_config(task: ProcessingTask) -> LegacyConfig:
     return load_legacy_config(config_path)
 
 
-def _resolve_original_files(original_path: str, storage_root: str) -> Sequence[str]:
+def local_storage_root() -> Path:
+    local_root = Path(get_settings().storage_local_root)
+    if not local_root.is_absolute():
+        backend_app_root = Path(__file__).resolve().parents[2]
+        local_root = (backend_app_root / local_root).resolve()
+    return local_root
+
+
+def resolve_original_files(original_path: str, storage_root: str) -> Sequence[str]:
     """Resolve original files.
 
     In local storage mode, `original_path` is usually a storage key like
@@ -123,10 +355,7 @@ def _resolve_original_files(original_path: str, storage_root: str) -> Sequence[s
         path = (Path(storage_root) / original_path).resolve()
 
     if path.is_dir():
-        files: list[str] = []
-        for ext in ("*.jpg", "*.jpeg", "*.png", "*.tif", "*.tiff"):
-            files.extend(str(file) for file in path.glob(ext))
-        return sorted(files)
+        return list_image_files(path)
 
     if path.is_file():
         return [str(path)]
@@ -134,33 +363,142 @@ def _resolve_original_files(original_path: str, storage_root: str) -> Sequence[s
     raise FileNotFoundError(str(path))
 
 
-async def _save_processed_images(images, output_dir: Path) -> Sequence[Path]:
-    result_paths = []
-    for idx, image in enumerate(images, start=1):
-        filename = output_dir / f"processed_{idx:03}.png"
-        await asyncio.to_thread(image.save, filename, format="PNG", optimize=True)
-        result_paths.append(filename)
-    return result_paths
+async def _load_checkpoints(
+    session: AsyncSession,
+    task: ProcessingTask,
+    original_files: Sequence[str],
+    output_dir: Path,
+) -> deque[TaskCheckpoint]:
+    """Checkpoints of ``task`` still usable, ordered by tile.
 
+    A checkpoint is dropped when its source moved in the listing or its saved
+    tile is gone, e.g. when the task resumes on another machine; that tile is
+    processed again.
+    """
 
-async def _upload_results(storage, asset: ImageAsset, images: Iterable[Path], ppt_path: Path):
-    image_urls = {}
-    for idx, image_path in enumerate(images, start=1):
-        with open(image_path, "rb") as f:
-            stored = await storage.upload_file(
-                key=f"tenants/{asset.tenant_id}/images/{image_path.name}",
-                data=f.read(),
-                content_type="image/png",
-            )
-            image_urls[f"image_{idx}"] = stored.url
-            if idx == 1:
-                image_urls["primary"] = stored.url
+    result = await session.exec(
+        select(TaskCheckpoint)
+        .where(TaskCheckpoint.task_id == task.id)
+        .order_by(TaskCheckpoint.tile_index)
+    )
+    usable: deque[TaskCheckpoint] = deque()
+    for checkpoint in result.all():
+        index = checkpoint.tile_index
+        if (
+            index < len(original_files)
+            and checkpoint.source == str(original_files[index])
+            and (output_dir / checkpoint.file_name).is_file()
+        ):
+            usable.append(checkpoint)
+        else:
+            await session.delete(checkpoint)
+    await session.commit()
+    return usable
+
+
+def _save_tile(
+    item: EncodedTile,
+    deck: StreamingDeckWriter | None,
+    parts: DeckPartBuilder | None,
+    filename: Path,
+) -> None:
+    filename.write_bytes(item.encoded.data)
+    _place_tile(
+        deck,
+        parts,
+        filename,
+        Path(item.source).name,
+        item.deck_data,
+        item.deck_data is item.encoded.data,
+    )
+
+
+def _restore_tile(
+    checkpoint: TaskCheckpoint,
+    deck: StreamingDeckWriter | None,
+    parts: DeckPartBuilder | None,
+    filename: Path,
+) -> None:
+    if filename.suffix.lower() == ".png":
+        deck_data = filename.read_bytes()
+    else:
+        # Same encoding as deck_profile() picks for non-PNG outputs.
+        with Image.open(filename) as image:
+            deck_data = encode_image(image, PROFILES["png_fast"]).data
+    _place_tile(
+        deck,
+        parts,
+        filename,
+        Path(checkpoint.source).name,
+        deck_data,
+        filename.suffix.lower() == ".png",
+    )
+
+
+def _place_tile(
+    deck: StreamingDeckWriter | None,
+    parts: DeckPartBuilder | None,
+    filename: Path,
+    label_name: str,
+    deck_data: bytes,
+    saved_as_deck_png: bool,
+) -> None:
+    if deck is not None:
+        deck.add_picture(io.BytesIO(deck_data), label_name)
+        return
 
+    # Part builders read the deck PNG back from disk; it is the saved tile
+    # unless the output profile is not PNG.
+    if saved_as_deck_png:
+        parts.add(filename, label_name)
+    else:
+        deck_path = filename.with_name(f".deck_{filename.stem}.png")
+        deck_path.write_bytes(deck_data)
+        parts.add(deck_path, label_name, temporary=True)
+
+
+async def _upload_image(storage, asset: ImageAsset, name: str, encoded: EncodedImage):
+    return await storage.upload_file(
+        key=f"tenants/{asset.tenant_id}/images/{name}",
+        data=encoded.data,
+        content_type=encoded.profile.content_type,
+    )
+
+
+async def _upload_ppt(storage, asset: ImageAsset, ppt_path: Path) -> str:
     with open(ppt_path, "rb") as f:
         ppt_stored = await storage.upload_file(
             key=f"tenants/{asset.tenant_id}/ppt/{ppt_path.name}",
             data=f.read(),
             content_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
         )
+    return ppt_stored.url
+
+
+async def _publish_part(
+    session: AsyncSession,
+    storage,
+    asset: ImageAsset,
+    task: ProcessingTask,
+    parts: DeckPartBuilder,
+    part: DeckPart,
+) -> None:
+    """Upload a finished part and point the task at the updated manifest."""
+
+    part.url = await _upload_ppt(storage, asset, parts.path(part))
+    task.result_path = await _upload_manifest(storage, asset, parts, complete=False)
+    await session.commit()
+
 
-    return {"images": image_urls, "ppt": ppt_stored.url}
+async def _upload_manifest(
+    storage, asset: ImageAsset, parts: DeckPartBuilder, complete: bool
+) -> str:
+    data = json.dumps(parts.manifest(complete), ensure_ascii=False, indent=2).encode("utf-8")
+    manifest_path = parts.output_dir / f"{parts.stem}_manifest.json"
+    manifest_path.write_bytes(data)
+    stored = await storage.upload_file(
+        key=f"tenants/{asset.tenant_id}/ppt/{manifest_path.name}",
+        data=data,
+        content_type="application/json",
+    )
+    return stored.url
@@ -0,0 +1,97 @@
+"""Fixed-size thumbnails of uploaded assets for list views."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import logging
+from pathlib import Path
+
+from PIL import Image, ImageOps
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.metrics import instrument_storage
+from app.models import ImageAsset
+
+_LOGGER = logging.getLogger(__name__)
+
+# Longest edge in pixels; the default is stored as ``thumbnail_path``.
+THUMBNAIL_SIZES = (128, 256, 512)
+DEFAULT_THUMBNAIL_SIZE = 256
+_JPEG_QUALITY = 80
+
+
+def render_thumbnails(
+    image_path: Path | str, sizes: tuple[int, ...] = THUMBNAIL_SIZES
+) -> dict[int, bytes]:
+    """Encode ``image_path`` as a JPEG thumbnail per size.
+
+    JPEGs are decoded at the smallest DCT scale that still covers the largest
+    size, and each smaller thumbnail is resized from the previous one, so a
+    large original is never decoded or resampled at full resolution.
+    """
+
+    largest = max(sizes)
+    with Image.open(image_path) as img:
+        img.draft("RGB", (largest, largest))
+        current = ImageOps.exif_transpose(img).convert("RGB")
+
+    thumbnails: dict[int, bytes] = {}
+    for size in sorted(sizes, reverse=True):
+        current.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        buffer = io.BytesIO()
+        current.save(buffer, format="JPEG", quality=_JPEG_QUALITY, progressive=True)
+        thumbnails[size] = buffer.getvalue()
+    return thumbnails
+
+
+async def generate_asset_thumbnails(session: AsyncSession, asset: ImageAsset) -> None:
+    """Render, upload and record the thumbnails of ``asset``.
+
+    For a directory asset the first image stands for the batch. Failures are
+    logged and leave the asset without thumbnails.
+    """
+
+    from app.services.storage import get_storage_backend
+    from app.services.tasks import local_storage_root, resolve_original_files
+
+    try:
+        files = resolve_original_files(asset.original_path, str(local_storage_root()))
+    except FileNotFoundError:
+        _LOGGER.warning("No original found for asset %s", asset.id)
+        return
+    if not files:
+        return
+
+    try:
+        thumbnails = await asyncio.to_thread(render_thumbnails, files[0])
+    except (OSError, ValueError, Image.DecompressionBombError):
+        _LOGGER.exception("Cannot render thumbnails for asset %s", asset.id)
+        return
+
+    storage = instrument_storage(get_storage_backend())
+    urls: dict[str, str] = {}
+    for size, data in thumbnails.items():
+        stored = await storage.upload_file(
+            key=f"tenants/{asset.tenant_id}/thumbnails/{asset.id}/{size}.jpg",
+            data=data,
+            content_type="image/jpeg",
+        )
+        urls[str(size)] = stored.url
+
+    meta = _load_meta(asset.meta_json)
+    meta["thumbnails"] = dict(sorted(urls.items(), key=lambda item: int(item[0])))
+    asset.meta_json = json.dumps(meta, ensure_ascii=False)
+    asset.thumbnail_path = urls[str(DEFAULT_THUMBNAIL_SIZE)]
+    await session.commit()
+
+
+def _load_meta(meta_json: str | None) -> dict:
+    if not meta_json:
+        return {}
+    try:
+        meta = json.loads(meta_json)
+    except ValueError:
+        return {}
+    return meta if isinstance(meta, dict) else {}
@@ -0,0 +1,155 @@
+"""Content-addressed cache of processed tiles."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from PIL import Image
+
+from app.core.config import get_settings
+from app.services.processor import CropConfig, ImageProcessingSettings
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bump when the processing pipeline changes its output for the same inputs.
+_CACHE_VERSION = 1
+_READ_CHUNK = 1024 * 1024
+
+
+class TileCache:
+    """Processed tiles stored as PNG files under ``root``.
+
+    Entries are keyed by a hash of the original image bytes plus every
+    setting that affects the output pixels, so re-runs and tasks sharing an
+    original reuse the tile. Reads refresh an entry's mtime; once the cache
+    grows past ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, root: Path, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = Lock()
+
+    def __reduce__(self):
+        # Worker processes receive the cache with every tile; keep one
+        # instance per process so the size is not re-scanned each time.
+        return _open_tile_cache, (self.root, self.max_bytes)
+
+    def key_for(
+        self,
+        image_file: Path | str,
+        crop: CropConfig,
+        output_size_px: int,
+        settings: ImageProcessingSettings,
+    ) -> str:
+        digest = hashlib.sha256()
+        with open(image_file, "rb") as file:
+            while chunk := file.read(_READ_CHUNK):
+                digest.update(chunk)
+
+        params = {
+            "version": _CACHE_VERSION,
+            "crop": [crop.left, crop.top, crop.width, crop.height],
+            "output_size_px": output_size_px,
+            "dpi": settings.dpi,
+            "size_cm": settings.size_cm,
+            "corner_radius_ratio": settings.corner_radius_ratio,
+            "fast_downscale": settings.fast_downscale,
+        }
+        digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        path = self._path(key)
+        try:
+            with Image.open(path) as image:
+                image.load()
+            os.utime(path)
+        except OSError:
+            return None
+        return image
+
+    def put(self, key: str, image: Image.Image) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write next to the target and rename, so concurrent readers never
+        # see a partial file.
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                image.save(file, format="PNG", compress_level=1)
+            os.replace(tmp_name, path)
+        except Exception:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += path.stat().st_size - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.png"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self.root.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        # Another process may share the directory, so re-read the real usage.
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._size = total
+        _LOGGER.info("Tile cache evicted down to %s bytes", total)
+
+
+@lru_cache
+def _open_tile_cache(root: Path, max_bytes: int) -> TileCache:
+    return TileCache(root, max_bytes)
+
+
+@lru_cache
+def get_tile_cache() -> Optional[TileCache]:
+    """Return the configured tile cache, or ``None`` when it is disabled."""
+
+    settings = get_settings()
+    if not settings.tile_cache_dir:
+        return None
+
+    root = Path(settings.tile_cache_dir)
+    if not root.is_absolute():
+        backend_root = Path(__file__).resolve().parents[2]
+        root = (backend_root / root).resolve()
+    root.mkdir(parents=True, exist_ok=True)
+    return TileCache(root, settings.tile_cache_max_bytes)
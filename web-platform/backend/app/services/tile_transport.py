@@ -0,0 +1,104 @@
+"""Hand processed tiles from worker processes to the parent without pickling.
+
+A worker copies the pixels of a tile into a ``multiprocessing.shared_memory``
+segment and returns only a small descriptor. The parent maps the segment and
+wraps it in an ``Image`` that reads the shared pixels directly; the segment is
+unlinked straight away and unmapped once the image is garbage collected.
+"""
+
+from __future__ import annotations
+
+import os
+import weakref
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Union
+
+import numpy as np
+from PIL import Image
+
+# On Windows a segment disappears when its last handle is closed, which
+# happens as soon as the worker returns, so tiles are pickled there instead.
+SHARED_MEMORY_AVAILABLE = os.name != "nt"
+
+# Modes ``Image.fromarray`` maps back from a plain uint8 array.
+_CHANNELS = {"L": 1, "RGB": 3, "RGBA": 4}
+
+
+@dataclass(frozen=True, slots=True)
+class SharedTile:
+    """Location and layout of a tile's pixels in shared memory."""
+
+    name: str
+    mode: str
+    size: tuple[int, int]
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        width, height = self.size
+        channels = _CHANNELS[self.mode]
+        return (height, width) if channels == 1 else (height, width, channels)
+
+
+TileTransport = Union[SharedTile, Image.Image]
+
+
+def export_tile(image: Image.Image) -> TileTransport:
+    """Move ``image`` into shared memory, in a worker process.
+
+    Images that cannot be shared are returned as they are and get pickled.
+    """
+
+    if not SHARED_MEMORY_AVAILABLE or image.mode not in _CHANNELS:
+        return image
+
+    data = image.tobytes()
+    segment = shared_memory.SharedMemory(create=True, size=len(data))
+    try:
+        segment.buf[: len(data)] = data
+    except BaseException:
+        segment.close()
+        segment.unlink()
+        raise
+    segment.close()
+    return SharedTile(name=segment.name, mode=image.mode, size=image.size)
+
+
+def import_tile(tile: TileTransport) -> Image.Image:
+    """Open an exported tile in the parent without copying its pixels.
+
+    The returned image is read-only; Pillow copies it on the first in-place
+    change.
+    """
+
+    if isinstance(tile, Image.Image):
+        return tile
+
+    segment = shared_memory.SharedMemory(name=tile.name)
+    segment.unlink()
+    pixels = np.ndarray(tile.shape, dtype=np.uint8, buffer=segment.buf)
+    image = Image.fromarray(pixels)
+    weakref.finalize(image, _close_segment, segment)
+    return image
+
+
+def discard_tile(tile: TileTransport) -> None:
+    """Free an exported tile that will not be imported."""
+
+    if isinstance(tile, Image.Image):
+        return
+    try:
+        segment = shared_memory.SharedMemory(name=tile.name)
+    except FileNotFoundError:
+        return
+    segment.unlink()
+    segment.close()
+
+
+def _close_segment(segment: shared_memory.SharedMemory) -> None:
+    try:
+        segment.close()
+    except BufferError:
+        # A view of the pixels outlived the image; the mapping is released
+        # when that view goes away.
+        pass
@@ -0,0 +1,100 @@
+"""Standalone task worker: ``python -m app.worker``.
+
+Run any number of these next to the API with ``TASK_QUEUE_MODE=worker``;
+they share the work through the leases in ``app.services.queue``. Task and
+storage metrics are recorded where tasks run, so each worker serves its
+own Prometheus endpoint.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import signal
+from typing import Optional
+
+from prometheus_client import start_http_server
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.db.session import async_session
+from app.services.queue import claim_next_task, worker_identity
+from app.services.tasks import run_claimed_task
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def run_worker(
+    worker_id: Optional[str] = None,
+    once: bool = False,
+    stop: Optional[asyncio.Event] = None,
+) -> int:
+    """Process tasks until ``stop`` is set, or the queue is empty with ``once``.
+
+    Returns the number of tasks run. A task that has started is always
+    finished before the worker stops.
+    """
+
+    worker_id = worker_id or worker_identity()
+    stop = stop or asyncio.Event()
+    poll_seconds = get_settings().worker_poll_seconds
+    processed = 0
+
+    _LOGGER.info("Worker %s started", worker_id)
+    while not stop.is_set():
+        try:
+            async with async_session() as session:  # type: ignore[call-arg]
+                task_id = await claim_next_task(session, worker_id)
+        except Exception:
+            _LOGGER.exception("Claiming a task failed")
+            task_id = None
+
+        if task_id is None:
+            if once:
+                break
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), timeout=poll_seconds)
+            continue
+
+        _LOGGER.info("Worker %s running task %s", worker_id, task_id)
+        await run_claimed_task(task_id, worker_id)
+        processed += 1
+
+    _LOGGER.info("Worker %s stopped after %s tasks", worker_id, processed)
+    return processed
+
+
+async def _main(args: argparse.Namespace) -> None:
+    port = get_settings().worker_metrics_port if args.metrics_port is None else args.metrics_port
+    if port:
+        start_http_server(port)
+        _LOGGER.info("Serving metrics on port %s", port)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        # Not available on Windows; Ctrl+C still raises KeyboardInterrupt.
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(signum, stop.set)
+    await run_worker(args.worker_id, once=args.once, stop=stop)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued processing tasks.")
+    parser.add_argument("--worker-id", help="name recorded on claimed tasks")
+    parser.add_argument(
+        "--once", action="store_true", help="exit when no task is waiting"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="port of the Prometheus endpoint, 0 to disable (default: WORKER_METRICS_PORT)",
+    )
+    configure_logging()
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
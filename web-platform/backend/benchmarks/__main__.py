@@ -0,0 +1,3 @@
+from benchmarks.processor_bench import main
+
+raise SystemExit(main())
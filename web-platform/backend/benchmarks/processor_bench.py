@@ -0,0 +1,354 @@
+"""Micro-benchmarks of the processor stages with stored baselines.
+
+Every case runs in its own interpreter so its peak RSS is not inflated by
+earlier cases. Usage, from ``web-platform/backend``::
+
+    python -m benchmarks                   # compare against baseline.json
+    python -m benchmarks --update          # record a new baseline
+    python -m benchmarks --case jpeg-8mp   # only cases containing the text
+
+The exit status is 1 when a case is slower or uses more memory than its
+baseline by more than the thresholds. Baselines are machine specific;
+record them on the machine that runs the comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from app.services.deck_writer import StreamingDeckWriter
+from app.services.encoding import PROFILES, encode_image
+from app.services.processor import (
+    CropConfig,
+    DeckBuilder,
+    ImageProcessingSettings,
+    create_rounded_rectangle_mask,
+    crop_image_to_rounded_rectangle,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+FORMATS = {"jpeg": ".jpg", "png": ".png", "tiff": ".tif"}
+MEGAPIXELS = (2, 8, 24)
+DECK_TILES = 160
+
+# Absolute differences below these are treated as noise.
+_MIN_SECONDS_DELTA = 0.005
+_MIN_RSS_DELTA_MB = 5.0
+
+_SETTINGS = ImageProcessingSettings(
+    dpi=300,
+    size_cm=5.0,
+    corner_radius_ratio=0.1,
+    label_config={"top_left": "A", "top_right": "B", "bottom_left": "C", "bottom_right": "D"},
+)
+_OUTPUT_SIZE_PX = int(_SETTINGS.size_cm / 2.54 * _SETTINGS.dpi)
+
+
+@dataclass(frozen=True, slots=True)
+class Case:
+    name: str
+    stage: str
+    format: Optional[str] = None
+    megapixels: Optional[int] = None
+
+
+def all_cases() -> list[Case]:
+    cases = [
+        Case(f"{fmt}-{mp}mp-{stage}", stage, fmt, mp)
+        for stage in ("crop", "crop_fast")
+        for fmt in FORMATS
+        for mp in MEGAPIXELS
+    ]
+    cases += [
+        Case("mask", "mask"),
+        Case("encode-png_optimized", "encode_png_optimized"),
+        Case("encode-png_fast", "encode_png_fast"),
+        Case(f"deck-builder-{DECK_TILES}", "deck_builder"),
+        Case(f"deck-streaming-{DECK_TILES}", "deck_streaming"),
+    ]
+    return cases
+
+
+def input_path(input_dir: Path, fmt: str, megapixels: int) -> Path:
+    return input_dir / f"synthetic_{megapixels}mp{FORMATS[fmt]}"
+
+
+def make_inputs(input_dir: Path, cases: list[Case]) -> None:
+    """Write the synthetic inputs the cases need, if not there already."""
+
+    input_dir.mkdir(parents=True, exist_ok=True)
+    for case in cases:
+        if case.format is None:
+            continue
+        path = input_path(input_dir, case.format, case.megapixels)
+        if not path.exists():
+            _synthetic_image(case.megapixels).save(path)
+
+
+def _synthetic_image(megapixels: int) -> Image.Image:
+    # 4:3 gradients with a texture and light noise: compressible like a
+    # photo, not like a flat colour.
+    width = int(math.sqrt(megapixels * 1_000_000 * 4 / 3))
+    height = width * 3 // 4
+    y, x = np.mgrid[0:height, 0:width]
+    rng = np.random.default_rng(megapixels)
+    noise = rng.integers(0, 12, size=(height, width), dtype=np.uint16)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[..., 0] = (x * 255 // width + noise) % 256
+    pixels[..., 1] = (y * 255 // height + noise) % 256
+    pixels[..., 2] = ((x // 16 ^ y // 16) * 8 + noise) % 256
+    return Image.fromarray(pixels, "RGB")
+
+
+def _centre_crop(path: Path) -> CropConfig:
+    with Image.open(path) as img:
+        width, height = img.size
+    side = int(min(width, height) * 0.8)
+    return CropConfig(left=(width - side) // 2, top=(height - side) // 2, width=side, height=side)
+
+
+def _tile() -> Image.Image:
+    tile = _synthetic_image(1).crop((0, 0, _OUTPUT_SIZE_PX, _OUTPUT_SIZE_PX)).convert("RGBA")
+    mask = create_rounded_rectangle_mask(tile.width, tile.height, _SETTINGS.corner_radius_ratio)
+    tile.putalpha(mask)
+    return tile
+
+
+def _stage(case: Case, input_dir: Path, scratch: Path) -> Callable[[], Any]:
+    """Set up ``case`` and return the callable to time."""
+
+    if case.stage in ("crop", "crop_fast"):
+        path = input_path(input_dir, case.format, case.megapixels)
+        crop = _centre_crop(path)
+        fast = case.stage == "crop_fast"
+        return lambda: crop_image_to_rounded_rectangle(
+            path, crop, _OUTPUT_SIZE_PX, _SETTINGS.corner_radius_ratio, fast_downscale=fast
+        )
+
+    if case.stage == "mask":
+        return lambda: create_rounded_rectangle_mask(
+            _OUTPUT_SIZE_PX, _OUTPUT_SIZE_PX, _SETTINGS.corner_radius_ratio
+        )
+
+    if case.stage.startswith("encode_"):
+        tile = _tile()
+        profile = PROFILES[case.stage.removeprefix("encode_")]
+        return lambda: encode_image(tile, profile)
+
+    if case.stage in ("deck_builder", "deck_streaming"):
+        data = encode_image(_tile(), PROFILES["png_fast"]).data
+
+        def build_deck() -> None:
+            if case.stage == "deck_builder":
+                deck = DeckBuilder(_SETTINGS, 4, 2, 0.2, 0.2)
+            else:
+                deck = StreamingDeckWriter(_SETTINGS, 4, 2, 0.2, 0.2, spool_dir=scratch)
+            for index in range(DECK_TILES):
+                deck.add_picture(io.BytesIO(data), f"image_{index}.jpg")
+            deck.save(scratch / "bench.pptx")
+
+        return build_deck
+
+    raise ValueError(f"Unknown benchmark stage: {case.stage}")
+
+
+def run_case(case: Case, input_dir: Path, repeat: int) -> dict[str, float]:
+    """Time ``case`` in this process; meant to run in a fresh interpreter."""
+
+    with tempfile.TemporaryDirectory() as scratch:
+        stage = _stage(case, input_dir, Path(scratch))
+        stage()  # warm-up: imports, caches, page faults
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            stage()
+            timings.append(time.perf_counter() - started)
+
+    return {
+        "seconds": round(statistics.median(timings), 5),
+        "min_seconds": round(min(timings), 5),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _peak_rss_mb() -> float:
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        )
+        return counters.PeakWorkingSetSize / (1024 * 1024)
+
+    if sys.platform.startswith("linux"):
+        # ru_maxrss survives fork and exec, so a child would report the peak
+        # of the parent; VmHWM belongs to the current address space only.
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+    import resource
+
+    # ru_maxrss is in bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+def _run_isolated(case: Case, input_dir: Path, repeat: int) -> dict[str, float]:
+    backend_root = Path(__file__).resolve().parents[1]
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.processor_bench",
+            "--run-case",
+            case.name,
+            "--input-dir",
+            str(input_dir),
+            "--repeat",
+            str(repeat),
+        ],
+        cwd=backend_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+    memory_threshold: float,
+) -> list[str]:
+    """Describe every result that regressed against ``baseline``."""
+
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        seconds, base_seconds = result["seconds"], base["seconds"]
+        if (
+            seconds > base_seconds * (1 + threshold)
+            and seconds - base_seconds > _MIN_SECONDS_DELTA
+        ):
+            regressions.append(
+                f"{name}: {seconds:.4f}s vs baseline {base_seconds:.4f}s "
+                f"(+{(seconds / base_seconds - 1) * 100:.0f}%)"
+            )
+        rss, base_rss = result["peak_rss_mb"], base["peak_rss_mb"]
+        if rss > base_rss * (1 + memory_threshold) and rss - base_rss > _MIN_RSS_DELTA_MB:
+            regressions.append(f"{name}: peak RSS {rss:.1f}MB vs baseline {base_rss:.1f}MB")
+    return regressions
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--case", action="append", default=[], help="Run cases containing this text"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown ratio")
+    parser.add_argument(
+        "--memory-threshold", type=float, default=0.15, help="Allowed peak RSS growth ratio"
+    )
+    parser.add_argument(
+        "--input-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "photo-platform-bench",
+        help="Where the synthetic inputs are cached",
+    )
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    cases = {case.name: case for case in all_cases()}
+    if args.run_case:
+        print(json.dumps(run_case(cases[args.run_case], args.input_dir, args.repeat)))
+        return 0
+
+    selected = [
+        case
+        for case in cases.values()
+        if not args.case or any(text in case.name for text in args.case)
+    ]
+    make_inputs(args.input_dir, selected)
+
+    results: dict[str, dict[str, float]] = {}
+    for case in selected:
+        results[case.name] = _run_isolated(case, args.input_dir, args.repeat)
+        result = results[case.name]
+        print(
+            f"{case.name:<32} {result['seconds'] * 1000:>10.1f} ms "
+            f"{result['peak_rss_mb']:>8.1f} MB"
+        )
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update:
+        merged = {**stored.get("cases", {}), **results}
+        payload = {"environment": _environment(), "cases": dict(sorted(merged.items()))}
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not stored:
+        print(f"No baseline at {args.baseline}; run with --update to record one.")
+        return 0
+
+    if stored.get("environment") != _environment():
+        print("Warning: baseline was recorded in a different environment.")
+    regressions = compare(results, stored["cases"], args.threshold, args.memory_threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
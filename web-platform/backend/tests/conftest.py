@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def sample_image(tmp_path: Path) -> Path:
+    path = tmp_path / "sample.jpg"
+    image = Image.new("RGB", (600, 480), (80, 120, 200))
+    for x in range(0, 600, 40):
+        image.paste((200, 60, 40), (x, 0, x + 20, 480))
+    image.save(path, quality=95)
+    return path
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.services.auto_crop import AutoCropProvider, detect_subject_crop
+from app.services.config_loader import LegacyConfig
+from app.services.processor import CropConfig
+
+
+def _subject_image(path: Path) -> Path:
+    image = Image.new("RGB", (2000, 1500), (245, 245, 245))
+    image.paste((30, 60, 90), (1200, 300, 1600, 900))
+    image.save(path, quality=90)
+    return path
+
+
+@pytest.mark.parametrize("name", ["subject.jpg", "subject.png", "subject.tif"])
+def test_detect_subject_crop_squares_around_subject(tmp_path: Path, name: str) -> None:
+    crop = detect_subject_crop(_subject_image(tmp_path / name))
+
+    assert crop is not None
+    assert crop.width == crop.height
+    assert crop.left <= 1200 and crop.left + crop.width >= 1600
+    assert crop.top <= 300 and crop.top + crop.height >= 900
+    assert crop.width < 800
+
+
+def test_auto_crop_falls_back_on_blank_images(tmp_path: Path) -> None:
+    blank = tmp_path / "blank.png"
+    Image.new("RGB", (400, 300), (255, 255, 255)).save(blank)
+    fallback = CropConfig(left=0, top=0, width=100, height=100)
+
+    assert AutoCropProvider(fallback)(blank) is fallback
+
+
+def test_crop_provider_honours_auto_detect(tmp_path: Path) -> None:
+    uniform = {"left": 0, "top": 0, "width": 1000, "height": 1000}
+    manual = LegacyConfig(raw={"crop_settings": {"uniform_crop": uniform}})
+    auto = LegacyConfig(raw={"crop_settings": {"uniform_crop": uniform, "auto_detect": True}})
+    path = _subject_image(tmp_path / "subject.jpg")
+
+    assert manual.crop_provider()(path) == CropConfig(0, 0, 1000, 1000)
+    assert auto.crop_provider()(path) != CropConfig(0, 0, 1000, 1000)
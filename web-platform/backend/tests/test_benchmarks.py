@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from benchmarks.processor_bench import all_cases, compare
+
+
+def test_compare_flags_regressions_beyond_threshold() -> None:
+    baseline = {
+        "fast": {"seconds": 0.100, "peak_rss_mb": 100.0},
+        "noisy": {"seconds": 0.001, "peak_rss_mb": 50.0},
+        "memory": {"seconds": 0.500, "peak_rss_mb": 100.0},
+    }
+    results = {
+        "fast": {"seconds": 0.140, "peak_rss_mb": 101.0},
+        "noisy": {"seconds": 0.003, "peak_rss_mb": 52.0},
+        "memory": {"seconds": 0.450, "peak_rss_mb": 130.0},
+        "new": {"seconds": 9.0, "peak_rss_mb": 900.0},
+    }
+
+    regressions = compare(results, baseline, threshold=0.25, memory_threshold=0.15)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("fast:")
+    assert regressions[1].startswith("memory: peak RSS")
+
+
+def test_case_names_are_unique() -> None:
+    names = [case.name for case in all_cases()]
+    assert len(names) == len(set(names))
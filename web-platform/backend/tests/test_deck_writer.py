@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from pathlib import Path
+
+from PIL import Image
+from pptx import Presentation
+
+from app.services.deck_parts import DeckPartBuilder
+from app.services.deck_writer import StreamingDeckWriter
+from app.services.processor import DeckBuilder, ImageProcessingSettings
+
+
+def _settings(top_left: str = "A&B") -> ImageProcessingSettings:
+    return ImageProcessingSettings(
+        dpi=300,
+        size_cm=5,
+        corner_radius_ratio=0.1,
+        label_config={"font_size": 10, "font_color": "#336699", "top_left": top_left, "bottom_right": "2"},
+    )
+
+
+def _png(color: tuple[int, int, int]) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 16), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_streaming_deck_matches_deck_builder(tmp_path: Path) -> None:
+    pictures = [_png((index * 40, 0, 0)) for index in range(5)]
+    builder = DeckBuilder(_settings(), 2, 1, 0.5, 0.5)
+    writer = StreamingDeckWriter(_settings(), 2, 1, 0.5, 0.5, spool_dir=tmp_path)
+    for index, data in enumerate(pictures):
+        builder.add_picture(io.BytesIO(data), f"img_{index}.jpg")
+        writer.add_picture(io.BytesIO(data), f"img_{index}.jpg")
+    builder.save(tmp_path / "expected.pptx")
+    writer.save(tmp_path / "streamed.pptx")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["expected.pptx", "streamed.pptx"]
+
+    expected = Presentation(str(tmp_path / "expected.pptx"))
+    streamed = Presentation(str(tmp_path / "streamed.pptx"))
+    assert len(streamed.slides) == len(expected.slides) == 3
+    assert streamed.slide_width == expected.slide_width
+    for slide, expected_slide in zip(streamed.slides, expected.slides):
+        assert slide.slide_layout.name == expected_slide.slide_layout.name
+        assert [shape.shape_type for shape in slide.shapes] == [
+            shape.shape_type for shape in expected_slide.shapes
+        ]
+
+    with zipfile.ZipFile(tmp_path / "expected.pptx") as exp, zipfile.ZipFile(
+        tmp_path / "streamed.pptx"
+    ) as got:
+        for number in (1, 2, 3):
+            name = f"ppt/slides/slide{number}.xml"
+            assert got.read(name) == exp.read(name)
+        assert got.read("ppt/media/image3.png") == pictures[2]
+
+
+def test_multi_line_labels_match_deck_builder(tmp_path: Path) -> None:
+    settings = _settings(top_left="Line 1\n\nLine\v2 <\x01>\n")
+    builder = DeckBuilder(settings, 2, 1, 0.5, 0.5)
+    writer = StreamingDeckWriter(settings, 2, 1, 0.5, 0.5, spool_dir=tmp_path)
+    for index in range(2):
+        builder.add_picture(io.BytesIO(_png((index, 0, 0))), f"img_{index}.jpg")
+        writer.add_picture(io.BytesIO(_png((index, 0, 0))), f"img_{index}.jpg")
+    builder.save(tmp_path / "expected.pptx")
+    writer.save(tmp_path / "streamed.pptx")
+
+    with zipfile.ZipFile(tmp_path / "expected.pptx") as exp, zipfile.ZipFile(
+        tmp_path / "streamed.pptx"
+    ) as got:
+        assert got.read("ppt/slides/slide1.xml") == exp.read("ppt/slides/slide1.xml")
+
+    label = Presentation(str(tmp_path / "streamed.pptx")).slides[0].shapes[1]
+    assert label.text_frame.text == "Line 1\n\nLine\v2 <_x0001_>\n"
+
+
+def test_discard_removes_spool(tmp_path: Path) -> None:
+    writer = StreamingDeckWriter(_settings(), 2, 2, 0.5, 0.5, spool_dir=tmp_path)
+    writer.add_picture(io.BytesIO(_png((0, 0, 0))), "a.jpg")
+    writer.discard()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_deck_parts_split_slides(tmp_path: Path) -> None:
+    pictures = []
+    for index in range(7):
+        path = tmp_path / f"tile_{index}.png"
+        path.write_bytes(_png((index, index, index)))
+        pictures.append(path)
+
+    layout = {"columns": 2, "rows": 1, "column_spacing_cm": 0.5, "row_spacing_cm": 0.5}
+    parts = DeckPartBuilder(tmp_path, _settings(), layout, slides_per_part=2, max_workers=2)
+    try:
+        for index, path in enumerate(pictures):
+            parts.add(path, path.name, temporary=index == 6)
+        built = parts.completed() + list(parts.finish())
+    finally:
+        parts.close()
+
+    assert sorted(part.name for part in built) == ["output_part001.pptx", "output_part002.pptx"]
+    manifest = parts.manifest(complete=True)
+    assert manifest["total_images"] == 7
+    assert [(part["first_slide"], part["last_slide"]) for part in manifest["parts"]] == [
+        (1, 2),
+        (3, 4),
+    ]
+    assert len(Presentation(str(parts.path(built[0]))).slides) == 2
+    assert not pictures[6].exists()
+    assert pictures[5].exists()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.services.config_loader import LegacyConfig
+from app.services.encoding import (
+    PROFILES,
+    deck_profile,
+    encode_image,
+    encode_tiles,
+    resolve_profile,
+)
+from app.services.processor import ProcessedTile
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_profiles_are_lossless(name: str) -> None:
+    image = Image.linear_gradient("L").convert("RGBA")
+    encoded = encode_image(image, PROFILES[name])
+
+    assert encoded.size == len(encoded.data) > 0
+    assert encoded.encode_seconds >= 0
+    with Image.open(io.BytesIO(encoded.data)) as decoded:
+        assert decoded.format == PROFILES[name].format
+        assert decoded.convert("RGBA").tobytes() == image.tobytes()
+
+
+def test_legacy_config_selects_profile() -> None:
+    config = LegacyConfig(raw={"output_settings": {"encoding": "png_fast", "compress_level": 6}})
+    profile = config.encoding_profile()
+
+    assert profile.name == "png_fast"
+    assert profile.options == {"compress_level": 6}
+    assert LegacyConfig(raw={}).encoding_profile() == PROFILES["png_optimized"]
+
+
+def test_deck_profile_falls_back_to_png() -> None:
+    assert deck_profile(PROFILES["png_fast"]) is PROFILES["png_fast"]
+    assert deck_profile(PROFILES["webp_lossless"]).format == "PNG"
+    with pytest.raises(ValueError):
+        resolve_profile("gif")
+
+
+def test_encode_tiles_keeps_input_order() -> None:
+    images = [Image.new("RGBA", (64, 64), (index, 0, 0, 255)) for index in range(10)]
+    tiles = [ProcessedTile(index=index, source=f"{index}.jpg", image=image) for index, image in enumerate(images)]
+
+    encoded = list(encode_tiles(tiles, PROFILES["png_fast"], max_workers=3))
+
+    assert [item.index for item in encoded] == list(range(10))
+    for item in encoded:
+        assert item.deck_data is item.encoded.data
+        with Image.open(io.BytesIO(item.encoded.data)) as decoded:
+            assert decoded.getpixel((0, 0)) == (item.index, 0, 0, 255)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from app.services.file_index import FileIndex, natural_key
+from app.services.processor import list_images
+
+
+def _touch(directory: Path, *names: str) -> None:
+    for name in names:
+        (directory / name).write_bytes(b"")
+
+
+def _age(directory: Path, seconds: int = 60) -> None:
+    stat = directory.stat()
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_lists_images_case_insensitively_in_natural_order(tmp_path: Path) -> None:
+    _touch(tmp_path, "img10.jpg", "IMG2.JPG", "img1.png", "scan.TIFF", "notes.txt", "img3.jpeg")
+    (tmp_path / "folder.jpg").mkdir()
+
+    names = [path.name for path in list_images(tmp_path)]
+
+    assert names == ["img1.png", "IMG2.JPG", "img3.jpeg", "img10.jpg", "scan.TIFF"]
+    assert [p.name for p in list_images(tmp_path, [".PNG"])] == ["img1.png"]
+
+
+def test_manifest_reused_until_directory_changes(tmp_path: Path) -> None:
+    index = FileIndex()
+    _touch(tmp_path, "a1.jpg", "a2.jpg")
+    _age(tmp_path)
+    cached = tmp_path.stat()
+    assert len(index.files(tmp_path)) == 2
+
+    # Same mtime: the manifest is served without rescanning.
+    _touch(tmp_path, "a3.jpg")
+    os.utime(tmp_path, ns=(cached.st_atime_ns, cached.st_mtime_ns))
+    assert len(index.files(tmp_path)) == 2
+
+    _touch(tmp_path, "a4.jpg")
+    assert [Path(path).name for path in index.files(tmp_path)] == [
+        "a1.jpg",
+        "a2.jpg",
+        "a3.jpg",
+        "a4.jpg",
+    ]
+
+
+def test_natural_key() -> None:
+    names = ["b", "a10", "A9", "a9b", "a09c"]
+    assert sorted(names, key=natural_key) == ["A9", "a9b", "a09c", "a10", "b"]
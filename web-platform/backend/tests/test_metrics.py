@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.metrics import MetricsMiddleware, instrument_storage
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_request_latency_labelled_by_route_template() -> None:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int) -> dict[str, int]:
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", labels)
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    assert _sample("http_request_duration_seconds_count", labels) == before + 2
+    assert _sample(
+        "http_request_duration_seconds_count",
+        {"method": "GET", "route": "unmatched", "status": "404"},
+    ) >= 1
+    assert _sample("http_requests_in_flight", {}) == 0
+
+
+def test_route_template_of_included_routers() -> None:
+    tasks = APIRouter()
+
+    @tasks.get("/tasks/{task_id}")
+    async def read_task(tenant_id: int, task_id: int) -> dict[str, int]:
+        return {"id": task_id}
+
+    tenants = APIRouter()
+    tenants.include_router(tasks, prefix="/tenants/{tenant_id}")
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(tenants, prefix="/api/v1")
+
+    labels = {"method": "GET", "route": "/api/v1/tenants/{tenant_id}/tasks/{task_id}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", labels)
+    client = TestClient(app)
+    # Values repeating and overlapping each other.
+    for path in ["/api/v1/tenants/1/tasks/11", "/api/v1/tenants/11/tasks/1", "/api/v1/tenants/1/tasks/1"]:
+        client.get(path)
+
+    assert _sample("http_request_duration_seconds_count", labels) == before + 3
+
+
+def test_instrumented_storage_counts_bytes() -> None:
+    @dataclass
+    class Stored:
+        key: str
+        url: str
+
+    class Backend:
+        async def upload_file(self, *, key: str, data: bytes, content_type: str) -> Stored:
+            return Stored(key, f"/storage/{key}")
+
+    labels = {"content_type": "application/x-test"}
+    before = _sample("storage_upload_bytes_total", labels)
+    storage = instrument_storage(Backend())
+    stored = asyncio.run(
+        storage.upload_file(key="a/b", data=b"12345", content_type="application/x-test")
+    )
+
+    assert stored.url == "/storage/a/b"
+    assert instrument_storage(storage) is storage
+    assert _sample("storage_upload_bytes_total", labels) == before + 5
+    assert _sample("storage_upload_duration_seconds_count", labels) >= 1
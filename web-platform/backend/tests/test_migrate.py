@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, inspect, text
+
+import app.models  # noqa: F401  (registers the tables)
+from app.db.migrate import add_missing_columns, add_missing_indexes
+
+
+def test_add_missing_columns_upgrades_old_table() -> None:
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE processing_tasks (id INTEGER PRIMARY KEY, tenant_id INTEGER, "
+                "image_asset_id INTEGER, status VARCHAR(10), error_message VARCHAR, "
+                "result_path VARCHAR, config_path VARCHAR, output_dir VARCHAR, "
+                "created_at DATETIME, updated_at DATETIME)"
+            )
+        )
+        conn.execute(text("INSERT INTO processing_tasks (id, status) VALUES (1, 'PENDING')"))
+
+        added = add_missing_columns(conn)
+        assert "processing_tasks.timings_json" in added
+        assert add_missing_columns(conn) == []
+
+        columns = {column["name"] for column in inspect(conn).get_columns("processing_tasks")}
+        assert {"timings_json", "image_count", "bytes_processed", "attempts"} <= columns
+        row = conn.execute(text("SELECT timings_json, attempts FROM processing_tasks")).one()
+        assert tuple(row) == (None, 0)
+
+        created = add_missing_indexes(conn)
+        assert "ix_processing_tasks_lease_expires_at" in created
+        assert add_missing_indexes(conn) == []
+        indexes = {index["name"] for index in inspect(conn).get_indexes("processing_tasks")}
+        assert {"ix_processing_tasks_lease_expires_at", "ix_processing_tasks_status"} <= indexes
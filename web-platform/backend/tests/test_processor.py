@@ -2,11 +2,19 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
+import pytest
+from PIL import Image, UnidentifiedImageError
+
 from app.services.processor import (
     CropConfig,
     ImageProcessingSettings,
+    compare_downscale_quality,
+    create_rounded_rectangle_mask,
     create_ppt,
     crop_image_to_rounded_rectangle,
+    iter_processed_images,
+    process_images,
 )
 
 
@@ -51,3 +59,149 @@ def test_create_ppt(tmp_path: Path, sample_image: Path) -> None:
     output_path = tmp_path / "output.pptx"
     prs.save(output_path)
     assert output_path.exists()
+
+
+def test_create_ppt_stamped_labels(sample_image: Path) -> None:
+    settings = ImageProcessingSettings(
+        dpi=72,
+        size_cm=3.0,
+        corner_radius_ratio=0.1,
+        label_config={"top_left": "A", "top_right": "line 1\nline 2", "bottom_right": "B"},
+    )
+    image = Image.new("RGB", (32, 32), "white")
+    prs = create_ppt(
+        [image] * 5,
+        [sample_image.name] * 5,
+        settings,
+        columns=2,
+        rows=1,
+        column_spacing_cm=0.2,
+        row_spacing_cm=0.2,
+    )
+
+    assert len(prs.slides) == 3
+    for slide in prs.slides:
+        ids = [shape.shape_id for shape in slide.shapes]
+        assert len(ids) == len(set(ids))
+        frames = [shape.text_frame for shape in slide.shapes if shape.has_text_frame]
+        assert [frame.text for frame in frames[:3]] == ["A", "line 1\nline 2", "B"]
+        assert all(frame.paragraphs[0].font.bold for frame in frames)
+
+
+def test_process_images_parallel_matches_serial(tmp_path: Path, sample_image: Path) -> None:
+    settings = ImageProcessingSettings(
+        dpi=72,
+        size_cm=5.0,
+        corner_radius_ratio=0.1,
+        label_config={},
+    )
+    crop = CropConfig(left=10, top=20, width=400, height=300)
+
+    serial = process_images([sample_image, sample_image], lambda path: crop, settings)
+    parallel = process_images([sample_image, sample_image], lambda path: crop, settings, workers=2)
+
+    assert [image.tobytes() for image in parallel] == [image.tobytes() for image in serial]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unreadable_image_fails_in_both_modes(
+    tmp_path: Path, sample_image: Path, workers: int
+) -> None:
+    settings = ImageProcessingSettings(dpi=72, size_cm=5.0, corner_radius_ratio=0.1, label_config={})
+    corrupt = tmp_path / "corrupt.jpg"
+    corrupt.write_bytes(b"not an image")
+    crop = CropConfig(left=10, top=20, width=400, height=300)
+
+    tiles = iter_processed_images(
+        [sample_image, corrupt, sample_image], lambda path: crop, settings, workers
+    )
+    assert next(tiles).index == 0
+    with pytest.raises(UnidentifiedImageError):
+        next(tiles)
+    tiles.close()
+
+
+def test_fast_downscale_stays_close_to_reference(tmp_path: Path) -> None:
+    source = tmp_path / "large.jpg"
+    gradient = Image.linear_gradient("L").resize((2400, 1800))
+    Image.merge("RGB", (gradient, gradient.rotate(90), gradient)).save(source, quality=95)
+    crop = CropConfig(left=100, top=50, width=2000, height=1600)
+
+    fast = crop_image_to_rounded_rectangle(source, crop, 200, 0.1, fast_downscale=True)
+    quality = compare_downscale_quality(source, crop, 200, 0.1)
+
+    assert fast.size == (200, 160)
+    assert quality.psnr > 35
+
+
+@pytest.mark.parametrize("mode", ["P", "1", "I;16"])
+def test_fast_downscale_handles_modes_reduce_rejects(tmp_path: Path, mode: str) -> None:
+    source = tmp_path / f"source.{'tif' if mode == 'I;16' else 'png'}"
+    gradient = Image.linear_gradient("L").resize((800, 600))
+    if mode == "P":
+        image = gradient.convert("RGB").quantize(16)
+        image.info["transparency"] = 0
+    else:
+        image = gradient.convert(mode)
+    image.save(source)
+    crop = CropConfig(left=0, top=0, width=800, height=600)
+
+    fast = crop_image_to_rounded_rectangle(source, crop, 100, 0.1, fast_downscale=True)
+    reference = crop_image_to_rounded_rectangle(source, crop, 100, 0.1)
+
+    assert fast.mode == reference.mode == "RGBA"
+    assert fast.size == reference.size == (100, 75)
+
+
+def test_rounded_corners_are_cleared(sample_image: Path) -> None:
+    crop = CropConfig(left=0, top=0, width=400, height=400)
+    first = crop_image_to_rounded_rectangle(sample_image, crop, 200, 0.2)
+    second = crop_image_to_rounded_rectangle(sample_image, crop, 200, 0.2)
+
+    mask = np.array(create_rounded_rectangle_mask(200, 200, 0.2)) > 128
+    pixels = np.array(first)
+    assert not pixels[~mask].any()
+    assert (pixels[mask][:, 3] == 255).all()
+    assert first.tobytes() == second.tobytes()
+
+
+def test_iter_processed_images_reports_source_index(tmp_path: Path, sample_image: Path) -> None:
+    settings = ImageProcessingSettings(
+        dpi=72,
+        size_cm=5.0,
+        corner_radius_ratio=0.1,
+        label_config={},
+    )
+    crops = {
+        sample_image: CropConfig(left=0, top=0, width=0, height=0),
+    }
+    files = [sample_image, tmp_path / "other.jpg"]
+    sample_image.with_name("other.jpg").write_bytes(sample_image.read_bytes())
+
+    tiles = list(
+        iter_processed_images(
+            files,
+            lambda path: crops.get(path, CropConfig(left=0, top=0, width=300, height=300)),
+            settings,
+        )
+    )
+
+    assert [(tile.index, tile.source) for tile in tiles] == [(1, files[1])]
+
+
+def test_region_read_matches_full_decode(tmp_path: Path) -> None:
+    source = tmp_path / "striped.tif"
+    gradient = Image.linear_gradient("L").resize((1200, 900))
+    Image.merge("RGB", (gradient, gradient.rotate(90), gradient)).save(
+        source, tiffinfo={278: 64}
+    )
+    crop = CropConfig(left=300, top=200, width=600, height=500)
+
+    for fast_downscale in (False, True):
+        full = crop_image_to_rounded_rectangle(
+            source, crop, 150, 0.1, fast_downscale=fast_downscale
+        )
+        region = crop_image_to_rounded_rectangle(
+            source, crop, 150, 0.1, fast_downscale=fast_downscale, region_read=True
+        )
+        assert region.tobytes() == full.tobytes()
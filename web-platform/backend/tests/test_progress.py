@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.models import ProcessingTask, TaskStatus
+from app.services import progress
+from app.services.progress import MemoryBroker, ProgressEvent, ProgressReporter
+
+
+def test_memory_broker_delivers_per_tenant() -> None:
+    async def run() -> list[ProgressEvent]:
+        broker = MemoryBroker()
+        async with broker.subscribe(1) as subscription:
+            await broker.publish(ProgressEvent(task_id=7, tenant_id=2, status="pending", stage="queued"))
+            await broker.publish(ProgressEvent(task_id=5, tenant_id=1, status="pending", stage="queued"))
+            received = [await asyncio.wait_for(subscription.get(), 1)]
+        await broker.publish(ProgressEvent(task_id=5, tenant_id=1, status="failed", stage="failed"))
+        return received
+
+    assert [event.task_id for event in asyncio.run(run())] == [5]
+
+
+def test_reporter_publishes_stages_with_eta(monkeypatch) -> None:
+    published: list[ProgressEvent] = []
+
+    async def record(event: ProgressEvent) -> None:
+        published.append(event)
+
+    monkeypatch.setattr(progress, "publish_progress", record)
+    task = ProcessingTask(id=3, tenant_id=1, image_asset_id=1, status=TaskStatus.PROCESSING)
+
+    async def run() -> None:
+        reporter = ProgressReporter(task)
+        await reporter.stage("process", total=4)
+        await reporter.advance(1)
+        await reporter.stage("deck")
+        task.status = TaskStatus.COMPLETED
+        await reporter.finish()
+
+    asyncio.run(run())
+
+    assert [(event.stage, event.done, event.total) for event in published] == [
+        ("process", 0, 4),
+        ("deck", 1, 4),
+        ("completed", 1, 4),
+    ]
+    assert published[-1].finished
+    assert ProgressEvent.from_json(published[0].to_json()) == published[0]
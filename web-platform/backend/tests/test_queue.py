@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import get_settings
+from app.models import ProcessingTask, TaskStatus, Tenant
+from app.services import cancellation
+from app.services.cancellation import CancellationCheck, LeaseLost, TaskCancelled
+from app.services.queue import (
+    Lease,
+    cancel_task,
+    claim_next_task,
+    claim_task,
+    extend_lease,
+    hold_lease,
+    queue_positions,
+    release_task,
+)
+
+
+def _run_with_tasks(tmp_path: Path, tenants: list[int], check) -> None:
+    async def run() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with sessions() as session:
+            for index, tenant_id in enumerate(tenants):
+                session.add(
+                    ProcessingTask(
+                        tenant_id=tenant_id,
+                        image_asset_id=1,
+                        created_at=datetime(2024, 1, 1) + timedelta(minutes=index),
+                    )
+                )
+            await session.commit()
+        try:
+            await check(sessions)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_claims_oldest_first_and_once(tmp_path: Path) -> None:
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            assert await claim_next_task(session, "a") == 1
+            assert await claim_next_task(session, "b") == 2
+            assert await claim_next_task(session, "c") is None
+            assert not await claim_task(session, 1, "c")
+
+            assert await extend_lease(session, 1, "a")
+            assert not await extend_lease(session, 1, "b")
+
+            task = await session.get(ProcessingTask, 1)
+            assert task.status == TaskStatus.PROCESSING
+            assert (task.worker_id, task.attempts) == ("a", 1)
+
+    _run_with_tasks(tmp_path, [1, 1], check)
+
+
+def test_expired_lease_is_reclaimed_then_failed(tmp_path: Path) -> None:
+    max_attempts = get_settings().task_max_attempts
+
+    async def expire(session: AsyncSession) -> None:
+        task = await session.get(ProcessingTask, 1)
+        task.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        await session.commit()
+
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            for attempt in range(1, max_attempts + 1):
+                assert await claim_next_task(session, f"worker-{attempt}") == 1
+                await expire(session)
+
+            assert await claim_next_task(session, "late") is None
+            task = await session.get(ProcessingTask, 1)
+            await session.refresh(task)
+            assert task.status == TaskStatus.FAILED
+            assert task.attempts == max_attempts
+
+    _run_with_tasks(tmp_path, [1], check)
+
+
+def test_interrupted_task_is_reclaimed_at_once(tmp_path: Path) -> None:
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            assert await claim_next_task(session, "a") == 1
+            await release_task(session, 1, "a")
+            assert await claim_next_task(session, "b") == 1
+
+            task = await session.get(ProcessingTask, 1)
+            task.status = TaskStatus.COMPLETED
+            await session.commit()
+            await release_task(session, 1, "b")
+            await session.refresh(task)
+            assert task.lease_expires_at is None
+            assert await claim_next_task(session, "c") is None
+
+    _run_with_tasks(tmp_path, [1], check)
+
+
+def test_tenants_share_slots_fairly(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "max_concurrent_tasks", 4)
+    monkeypatch.setattr(get_settings(), "max_tasks_per_tenant", 2)
+
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            # Tenant 1 queued a bulk job before tenant 2's single task.
+            assert await queue_positions(session, range(1, 7)) == {
+                1: 1,
+                6: 2,
+                2: 3,
+                3: 4,
+                4: 5,
+                5: 6,
+            }
+
+            assert [await claim_next_task(session, "w") for _ in range(3)] == [1, 6, 2]
+            # Tenant 1 is at its limit and tenant 2 has nothing left.
+            assert await claim_next_task(session, "w") is None
+            assert await queue_positions(session, [1, 4, 6]) == {4: 2}
+
+    _run_with_tasks(tmp_path, [1, 1, 1, 1, 1, 2], check)
+
+
+def test_positions_follow_tenant_weights(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_settings(), "max_concurrent_tasks", 10)
+    monkeypatch.setattr(get_settings(), "max_tasks_per_tenant", 10)
+
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            session.add(Tenant(id=1, name="heavy", slug="heavy", task_weight=2))
+            await session.commit()
+
+            positions = await queue_positions(session, range(1, 7))
+            assert positions == {1: 1, 5: 2, 2: 3, 3: 4, 6: 5, 4: 6}
+            claimed = [await claim_next_task(session, "w") for _ in range(6)]
+            assert claimed == sorted(positions, key=positions.get)
+
+    _run_with_tasks(tmp_path, [1, 1, 1, 1, 2, 2], check)
+
+
+def test_cancel_stops_waiting_and_running_tasks(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cancellation, "_POLL_SECONDS", 0)
+
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            assert await claim_next_task(session, "w") == 1
+            running = CancellationCheck(1, None, session_factory=sessions)
+            await running.check()
+
+            assert await cancel_task(session, 1)
+            assert await cancel_task(session, 2)
+            assert not await cancel_task(session, 2)
+            # Cancelled tasks are never claimed.
+            assert await claim_next_task(session, "w") == 3
+
+            with pytest.raises(TaskCancelled) as stopped:
+                await running.check()
+            assert stopped.value.status == TaskStatus.CANCELLED
+
+            over_budget = CancellationCheck(3, 0.01, session_factory=sessions)
+            await asyncio.sleep(0.02)
+            with pytest.raises(TaskCancelled) as stopped:
+                await over_budget.check()
+            assert stopped.value.status == TaskStatus.FAILED
+
+    _run_with_tasks(tmp_path, [1, 1, 1], check)
+
+
+def test_run_stops_once_its_lease_is_taken(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cancellation, "_POLL_SECONDS", 0)
+
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            assert await claim_next_task(session, "a") == 1
+            stale = CancellationCheck(1, None, session_factory=sessions, lease=Lease(1, "a"))
+            await stale.check()
+            assert not await stale.lease_lost()
+
+            task = await session.get(ProcessingTask, 1)
+            task.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+            await session.commit()
+            assert await claim_next_task(session, "b") == 1
+
+            with pytest.raises(LeaseLost):
+                await stale.check()
+            assert await stale.lease_lost()
+
+    _run_with_tasks(tmp_path, [1], check)
+
+
+def test_heartbeat_marks_a_taken_lease_lost(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(get_settings(), "task_lease_seconds", 0.06)
+
+    async def check(sessions) -> None:
+        async with sessions() as session:
+            assert await claim_next_task(session, "a") == 1
+            async with hold_lease(1, "a", session_factory=sessions) as lease:
+                await asyncio.sleep(0.05)
+                assert not lease.lost
+                assert await claim_task(session, 1, "b", now=datetime.utcnow() + timedelta(seconds=1))
+                await asyncio.sleep(0.05)
+                assert lease.lost
+
+            task = await session.get(ProcessingTask, 1)
+            await session.refresh(task)
+            # Releasing the lost lease leaves the new holder alone.
+            assert task.worker_id == "b"
+            assert task.lease_expires_at is not None
+
+    _run_with_tasks(tmp_path, [1], check)
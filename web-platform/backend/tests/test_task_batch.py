@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+pytest.importorskip("app.services.storage")
+
+from app.api.endpoints.tasks.routes import create_tasks  # noqa: E402
+from app.core.config import get_settings  # noqa: E402
+from app.models import ImageAsset, ProcessingTask, TaskStatus, Tenant, User  # noqa: E402
+from app.schemas.task import TaskBatchCreate  # noqa: E402
+
+
+def _run(tmp_path: Path, check) -> None:
+    async def run() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'batch.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with sessions() as session:
+            tenants = [Tenant(name="a", slug="a"), Tenant(name="b", slug="b")]
+            session.add_all(tenants)
+            await session.commit()
+            users = [
+                User(tenant_id=tenant.id, email=f"{tenant.slug}@example.com", hashed_password="x")
+                for tenant in tenants
+            ]
+            session.add_all(users)
+            await session.commit()
+            session.add_all(
+                ImageAsset(tenant_id=user.tenant_id, uploaded_by_id=user.id, original_path="x")
+                for user in users
+            )
+            await session.commit()
+            try:
+                await check(session, tenants[0], users[0])
+            finally:
+                await session.close()
+                await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_batch_queues_every_task(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "task_queue_mode", "worker")
+
+    async def check(session: AsyncSession, tenant: Tenant, user: User) -> None:
+        payload = TaskBatchCreate(
+            tenant_id=tenant.id,
+            tasks=[
+                {"image_asset_id": 1, "config_path": "a.json"},
+                {"image_asset_id": 1, "config_path": "b.json", "time_budget_seconds": 60},
+            ],
+        )
+        created = await create_tasks(payload, session=session, tenant=tenant, user=user)
+
+        assert [task.config_path for task in created] == ["a.json", "b.json"]
+        assert [task.queue_position for task in created] == [1, 2]
+        assert created[1].time_budget_seconds == 60
+        assert all(task.status == TaskStatus.PENDING for task in created)
+
+    _run(tmp_path, check)
+
+
+def test_batch_rejects_foreign_assets(tmp_path: Path) -> None:
+    async def check(session: AsyncSession, tenant: Tenant, user: User) -> None:
+        payload = TaskBatchCreate(
+            tenant_id=tenant.id,
+            tasks=[{"image_asset_id": 1}, {"image_asset_id": 2}, {"image_asset_id": 3}],
+        )
+        with pytest.raises(HTTPException) as rejected:
+            await create_tasks(payload, session=session, tenant=tenant, user=user)
+        assert rejected.value.status_code == 404
+        assert "[2, 3]" in rejected.value.detail
+        assert (await session.exec(select(ProcessingTask))).all() == []
+
+    _run(tmp_path, check)
+
+
+def test_batch_size_is_bounded() -> None:
+    with pytest.raises(ValidationError):
+        TaskBatchCreate(tenant_id=1, tasks=[])
+    with pytest.raises(ValidationError):
+        TaskBatchCreate(tenant_id=1, tasks=[{"image_asset_id": 1}] * 501)
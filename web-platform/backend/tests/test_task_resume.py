@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+pytest.importorskip("app.services.storage")
+
+from app.models import ImageAsset, ProcessingTask, TaskCheckpoint, TaskStatus, Tenant, User  # noqa: E402
+from app.services import cancellation, tasks  # noqa: E402
+from app.services.config_loader import LegacyConfig  # noqa: E402
+from app.services.processor import CropConfig  # noqa: E402
+
+
+class _Storage:
+    def __init__(self) -> None:
+        self.uploads: dict[str, bytes] = {}
+
+    async def upload_file(self, key: str, data: bytes, content_type: str) -> SimpleNamespace:
+        self.uploads[key] = data
+        return SimpleNamespace(key=key, url=f"/files/{key}")
+
+
+def test_resumed_task_keeps_every_tile(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    storage = _Storage()
+    monkeypatch.setattr(tasks, "get_storage_backend", lambda: storage)
+    monkeypatch.setattr(cancellation, "_POLL_SECONDS", float("inf"))
+
+    source = tmp_path / "source"
+    source.mkdir()
+    for name, color in zip("abcd", ["red", "green", "blue", "yellow"]):
+        Image.new("RGB", (240, 240), color).save(source / f"{name}.png")
+    config = tmp_path / "config.json"
+    config.write_text(
+        json.dumps(
+            {
+                "crop_settings": {"uniform_crop": {"left": 0, "top": 0, "width": 200, "height": 200}},
+                "image_settings": {"size_cm": 2.0, "dpi": 72},
+            }
+        )
+    )
+    output_dir = tmp_path / "out"
+
+    # The first run skips c.png, as if its crop was invalid then; the task
+    # then runs again, as after an interruption.
+    uniform_provider = LegacyConfig.crop_provider
+
+    def skip_c(self: LegacyConfig):
+        provider = uniform_provider(self)
+        return lambda path: CropConfig(0, 0, 0, 0) if Path(path).name == "c.png" else provider(path)
+
+    async def run() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'resume.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        try:
+            async with sessions() as session:
+                tenant = Tenant(name="t", slug="t")
+                session.add(tenant)
+                await session.commit()
+                user = User(tenant_id=tenant.id, email="t@example.com", hashed_password="x")
+                session.add(user)
+                await session.commit()
+                asset = ImageAsset(
+                    tenant_id=tenant.id, uploaded_by_id=user.id, original_path=str(source)
+                )
+                session.add(asset)
+                await session.commit()
+                task = ProcessingTask(
+                    tenant_id=tenant.id,
+                    image_asset_id=asset.id,
+                    config_path=str(config),
+                    output_dir=str(output_dir),
+                    status=TaskStatus.PROCESSING,
+                )
+                session.add(task)
+                await session.commit()
+
+                with monkeypatch.context() as patched:
+                    patched.setattr(LegacyConfig, "crop_provider", skip_c)
+                    await tasks.execute_processing_task(session, task)
+                first_run = {
+                    name: (output_dir / name).read_bytes()
+                    for name in ["task_1/processed_001.png", "task_1/processed_004.png"]
+                }
+
+                task.status = TaskStatus.PROCESSING
+                await session.commit()
+                await tasks.execute_processing_task(session, task)
+                assert task.status == TaskStatus.COMPLETED
+
+                result = await session.exec(
+                    select(TaskCheckpoint).order_by(TaskCheckpoint.tile_index)
+                )
+                checkpoints = result.all()
+        finally:
+            await engine.dispose()
+
+        assert [(c.tile_index, c.file_name) for c in checkpoints] == [
+            (index, f"task_1/processed_{index + 1:03}.png") for index in range(4)
+        ]
+        for name, data in first_run.items():
+            assert (output_dir / name).read_bytes() == data
+        colors = set()
+        for checkpoint in checkpoints:
+            with Image.open(output_dir / checkpoint.file_name) as tile:
+                colors.add(tile.convert("RGB").getpixel((tile.width // 2, tile.height // 2)))
+        assert len(colors) == 4
+        assert {f"tenants/1/images/{c.file_name}" for c in checkpoints} <= set(storage.uploads)
+
+        deck = Presentation(str(output_dir / "task1.pptx"))
+        pictures = [
+            shape
+            for slide in deck.slides
+            for shape in slide.shapes
+            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE
+        ]
+        assert len(pictures) == 4
+
+    asyncio.run(run())
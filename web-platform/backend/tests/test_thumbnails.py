@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from app.models import ImageAsset
+from app.services.thumbnails import THUMBNAIL_SIZES, generate_asset_thumbnails, render_thumbnails
+
+
+def test_render_thumbnails_sizes(sample_image: Path) -> None:
+    thumbnails = render_thumbnails(sample_image)
+
+    assert sorted(thumbnails) == sorted(THUMBNAIL_SIZES)
+    for size, data in thumbnails.items():
+        with Image.open(io.BytesIO(data)) as thumbnail:
+            assert thumbnail.format == "JPEG"
+            assert max(thumbnail.size) == size
+            # The sample image is 600x480; the aspect ratio is kept.
+            assert thumbnail.width / thumbnail.height == pytest.approx(1.25, abs=0.02)
+
+
+@pytest.mark.parametrize("kind", ["truncated", "bomb"])
+def test_unreadable_originals_leave_no_thumbnails(
+    tmp_path: Path,
+    sample_image: Path,
+    kind: str,
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    # The thumbnail service uploads through the storage backend.
+    pytest.importorskip("app.services.storage")
+
+    original = tmp_path / "original.png"
+    if kind == "truncated":
+        original.write_bytes(sample_image.read_bytes()[:200])
+    else:
+        Image.new("RGB", (600, 480)).save(original)
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    asset = ImageAsset(id=1, tenant_id=1, uploaded_by_id=1, original_path=str(original))
+
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(generate_asset_thumbnails(None, asset))  # type: ignore[arg-type]
+
+    assert asset.thumbnail_path is None
+    assert "Cannot render thumbnails for asset 1" in caplog.text
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from app.services import processor
+from app.services.processor import CropConfig, ImageProcessingSettings, process_images
+from app.services.tile_cache import TileCache
+
+SETTINGS = ImageProcessingSettings(
+    dpi=72,
+    size_cm=5.0,
+    corner_radius_ratio=0.1,
+    label_config={},
+)
+CROP = CropConfig(left=0, top=0, width=300, height=300)
+
+
+def test_cached_tiles_skip_processing(
+    tmp_path: Path, sample_image: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = TileCache(tmp_path / "cache", max_bytes=10 * 1024**2)
+    first = process_images([sample_image], lambda path: CROP, SETTINGS, cache=cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("tile should come from the cache")
+
+    monkeypatch.setattr(processor, "_process_image", fail)
+    second = process_images([sample_image], lambda path: CROP, SETTINGS, cache=cache)
+
+    assert second[0].tobytes() == first[0].tobytes()
+
+
+def test_cache_key_tracks_settings(tmp_path: Path, sample_image: Path) -> None:
+    cache = TileCache(tmp_path / "cache", max_bytes=10 * 1024**2)
+    other = ImageProcessingSettings(
+        dpi=72,
+        size_cm=5.0,
+        corner_radius_ratio=0.2,
+        label_config={"top_left": "ignored"},
+    )
+
+    assert cache.key_for(sample_image, CROP, 141, SETTINGS) != cache.key_for(
+        sample_image, CROP, 141, other
+    )
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path, sample_image: Path) -> None:
+    image = process_images([sample_image], lambda path: CROP, SETTINGS)[0]
+    probe = TileCache(tmp_path / "probe", max_bytes=10 * 1024**2)
+    probe.put("0" * 64, image)
+    entry_size = next((tmp_path / "probe").glob("*/*.png")).stat().st_size
+
+    cache = TileCache(tmp_path / "cache", max_bytes=int(entry_size * 1.5))
+    cache.put("a" * 64, image)
+    os.utime(cache._path("a" * 64), (0, 0))
+    cache.put("b" * 64, image)
+
+    assert cache.get("a" * 64) is None
+    assert cache.get("b" * 64) is not None
+
+
+def test_overwriting_an_entry_keeps_the_size(tmp_path: Path, sample_image: Path) -> None:
+    image = process_images([sample_image], lambda path: CROP, SETTINGS)[0]
+    cache = TileCache(tmp_path / "cache", max_bytes=10 * 1024**2)
+    cache.put("a" * 64, image)
+    cache.put("b" * 64, image)
+    for _ in range(3):
+        cache.put("a" * 64, image)
+
+    assert cache._size == cache._scan_size()
+
+
+def test_parallel_workers_fill_and_read_the_cache(tmp_path: Path, sample_image: Path) -> None:
+    cache = TileCache(tmp_path / "cache", max_bytes=10 * 1024**2)
+    files = [sample_image, sample_image]
+    reference = process_images(files, lambda path: CROP, SETTINGS)
+    first = process_images(files, lambda path: CROP, SETTINGS, workers=2, cache=cache)
+    entries = list((tmp_path / "cache").glob("*/*.png"))
+    second = process_images(files, lambda path: CROP, SETTINGS, workers=2, cache=cache)
+
+    assert len(entries) == 1
+    assert [tile.tobytes() for tile in first] == [tile.tobytes() for tile in reference]
+    assert [tile.tobytes() for tile in second] == [tile.tobytes() for tile in reference]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+import pytest
+from PIL import Image
+
+from app.services.tile_transport import (
+    SHARED_MEMORY_AVAILABLE,
+    SharedTile,
+    discard_tile,
+    export_tile,
+    import_tile,
+)
+
+pytestmark = pytest.mark.skipif(not SHARED_MEMORY_AVAILABLE, reason="tiles are pickled on Windows")
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "RGBA"])
+def test_round_trip_through_shared_memory(mode: str) -> None:
+    original = Image.linear_gradient("L").resize((64, 32)).convert(mode)
+    exported = export_tile(original)
+    assert isinstance(exported, SharedTile)
+
+    image = import_tile(exported)
+    assert image.mode == mode
+    assert image.size == (64, 32)
+    assert image.tobytes() == original.tobytes()
+    # The segment is unlinked as soon as the parent has mapped it.
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=exported.name)
+
+
+def test_unsupported_modes_and_discard() -> None:
+    palette = Image.new("P", (4, 4))
+    assert export_tile(palette) is palette
+
+    exported = export_tile(Image.new("RGBA", (8, 8)))
+    discard_tile(exported)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=exported.name)
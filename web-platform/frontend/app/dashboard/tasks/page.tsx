@@ -8,7 +8,7 @@ import { useEffect } from "react";
 import { useAuth } from "@/src/context/AuthContext";
 import { useTasks } from "@/src/hooks/useTasks";
 import { useTenants } from "@/src/hooks/useTenants";
-import { API_BASE_URL } from "@/src/lib/api";
+import { API_BASE_URL, api } from "@/src/lib/api";
 import type { Task } from "@/src/types";
 
 function getBackendOrigin(): string {
@@ -79,7 +79,15 @@ export default function TasksPage() {
   const router = useRouter();
   const { accessToken, tenantId, selectTenant } = useAuth();
   const { tenants, isLoading: tenantsLoading } = useTenants();
-  const { tasks, isLoading, error } = useTasks(tenantId);
+  const { tasks, isLoading, error, mutate } = useTasks(tenantId);
+
+  const cancelTask = async (taskId: number) => {
+    try {
+      await api.post<Task>(`/tasks/${taskId}/cancel`);
+    } finally {
+      mutate();
+    }
+  };
 
   useEffect(() => {
     if (!accessToken) {
@@ -169,12 +177,25 @@ export default function TasksPage() {
                             rel="noreferrer"
                             className="inline-flex rounded-full bg-brand-primary px-4 py-2 text-xs font-medium text-white transition hover:bg-brand-secondary"
                           >
-                            下载 PPT
+                            {href.endsWith(".json") ? "查看 PPT 分卷" : "下载 PPT"}
                           </a>
-                        ) : task.status === "failed" ? (
+                        ) : task.status === "failed" || task.status === "cancelled" ? (
                           <span className="text-rose-300" title={task.error_message ?? undefined}>
-                            {task.error_message ? "失败（查看原因）" : "失败"}
+                            {task.status === "cancelled"
+                              ? "已取消"
+                              : task.error_message
+                                ? "失败（查看原因）"
+                                : "失败"}
                           </span>
+                        ) : task.status === "processing" && task.progress?.total ? (
+                          <span className="text-slate-400">
+                            {task.progress.done}/{task.progress.total}
+                            {task.progress.eta_seconds != null
+                              ? ` · 约 ${Math.ceil(task.progress.eta_seconds)} 秒`
+                              : ""}
+                          </span>
+                        ) : task.queue_position ? (
+                          <span className="text-slate-400">排队第 {task.queue_position} 位</span>
                         ) : (
                           <span className="text-slate-400">-</span>
                         )}
@@ -186,6 +207,15 @@ export default function TasksPage() {
                         >
                           详情
                         </Link>
+                        {task.status === "pending" || task.status === "processing" ? (
+                          <button
+                            type="button"
+                            onClick={() => cancelTask(task.id)}
+                            className="ml-4 text-sm text-rose-300 transition hover:opacity-80"
+                          >
+                            取消
+                          </button>
+                        ) : null}
                       </td>
                     </tr>
                   );
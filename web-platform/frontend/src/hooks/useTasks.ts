@@ -1,12 +1,56 @@
+import { useEffect } from "react";
 import useSWR from "swr";
 
 import { api } from "@/src/lib/api";
-import type { Task } from "@/src/types";
+import type { Task, TaskProgress } from "@/src/types";
+
+// Wait before reconnecting a dropped event stream.
+const RECONNECT_MS = 3000;
 
 export function useTasks(tenantId: number | null) {
   const key = tenantId != null ? `/tasks` : null;
   const { data, error, isLoading, mutate } = useSWR<Task[]>(key, api.get);
 
+  // Progress is pushed over one event stream instead of refetching the list;
+  // the list is only reloaded for tasks it does not know or that finished.
+  useEffect(() => {
+    if (tenantId == null) return;
+    const controller = new AbortController();
+
+    const onEvent = (event: TaskProgress) => {
+      mutate(
+        (tasks) => {
+          if (!tasks?.some((task) => task.id === event.task_id)) return tasks;
+          return tasks.map((task) =>
+            task.id === event.task_id
+              ? { ...task, status: event.status, queue_position: null, progress: event }
+              : task,
+          );
+        },
+        { revalidate: false },
+      );
+      if (event.stage === "queued" || ["completed", "failed", "cancelled"].includes(event.status)) {
+        mutate();
+      }
+    };
+
+    const connect = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          await api.events<TaskProgress>("/tasks/events", onEvent, controller.signal);
+        } catch {
+          // Reconnect below unless the component unmounted.
+        }
+        if (controller.signal.aborted) return;
+        await new Promise((resolve) => setTimeout(resolve, RECONNECT_MS));
+        mutate();
+      }
+    };
+    connect();
+
+    return () => controller.abort();
+  }, [tenantId, mutate]);
+
   return {
     tasks: data,
     isLoading,
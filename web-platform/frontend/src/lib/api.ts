@@ -81,4 +81,42 @@ export const api = {
 
     return (await response.json()) as T;
   },
+  // Server-Sent Events over fetch, since EventSource cannot send the auth header.
+  // Resolves when the server closes the stream or `signal` aborts.
+  events: async <T>(path: string, onEvent: (event: T) => void, signal?: AbortSignal) => {
+    const token = authStorage.get();
+    const tenantSlug = getTenantSlugFromLocation();
+
+    const response = await fetch(`${API_BASE_URL}${path}`, {
+      headers: {
+        Accept: "text/event-stream",
+        ...(token ? { Authorization: `Bearer ${token.accessToken}` } : {}),
+        ...(tenantSlug ? { "x-tenant-slug": tenantSlug } : {}),
+      },
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Event stream failed with ${response.status}`);
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value;
+      let end = buffer.indexOf("\n\n");
+      while (end >= 0) {
+        const data = buffer
+          .slice(0, end)
+          .split("\n")
+          .filter((line) => line.startsWith("data:"))
+          .map((line) => line.slice(5).trim())
+          .join("\n");
+        buffer = buffer.slice(end + 2);
+        if (data) onEvent(JSON.parse(data) as T);
+        end = buffer.indexOf("\n\n");
+      }
+    }
+  },
 };
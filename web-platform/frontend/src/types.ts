@@ -5,6 +5,7 @@ export type Tenant = {
   custom_domain?: string | null;
   contact_email?: string | null;
   is_active: boolean;
+  task_weight?: number;
   created_at: string;
   updated_at: string;
 };
@@ -26,13 +27,31 @@ export type Task = {
   id: number;
   tenant_id: number;
   image_asset_id: number;
-  status: "pending" | "processing" | "completed" | "failed";
+  status: "pending" | "processing" | "completed" | "failed" | "cancelled";
   error_message?: string | null;
   result_path?: string | null;
+  stage_timings?: Record<string, number> | null;
+  image_count?: number | null;
+  bytes_processed?: number | null;
+  attempts?: number;
+  queue_position?: number | null;
+  time_budget_seconds?: number | null;
+  // Latest streamed progress; not part of the REST payload.
+  progress?: TaskProgress;
   created_at: string;
   updated_at: string;
 };
 
+export type TaskProgress = {
+  task_id: number;
+  tenant_id: number;
+  status: Task["status"];
+  stage: string;
+  done: number;
+  total: number;
+  eta_seconds?: number | null;
+};
+
 export type UploadResponse = {
   storage_key: string;
   url: string;